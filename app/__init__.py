@@ -0,0 +1,99 @@
+import os
+from flask import Flask
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CONFIG = {
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///scores.db',
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    # Create missing tables on startup
+    'CREATE_SCHEMA': True,
+    # Start the background scheduler (only the leader process runs its jobs)
+    'SCHEDULER_ENABLED': True,
+    # Import the scoring stack (NumPy, jellyfish, Levenshtein, reward) at startup.
+    # Enable with gunicorn --preload so workers share those pages after fork;
+    # otherwise it is imported on the first scoring request.
+    'PRELOAD_SCORING': os.getenv('YANEZ_PRELOAD_SCORING', '').lower() in ('1', 'true', 'yes'),
+    # 'rows' stores one VariationScore row per variation; 'packed' stores one
+    # compact blob per NameScore (read back transparently by the API)
+    'VARIATION_STORAGE': os.getenv('YANEZ_VARIATION_STORAGE', 'rows'),
+    # Reuse the stored scores of names whose payload is unchanged since the
+    # uid's previous session instead of rescoring them
+    'INCREMENTAL_SCORING': os.getenv('YANEZ_INCREMENTAL_SCORING', '').lower() in ('1', 'true', 'yes'),
+    # Seconds POST /api/yanez/score may spend scoring before the remaining names
+    # are left unscored; keep it below the gunicorn --timeout (default 30) so the
+    # session is always committed. 0 disables the deadline.
+    'SCORING_DEADLINE_SECONDS': float(os.getenv('YANEZ_SCORING_DEADLINE_SECONDS', 20)),
+    # Total time budget of POST /api/yanez/score, scoring plus saving; keep it
+    # below the gunicorn --timeout. A durable write-behind request that has not
+    # been saved by then is withdrawn and answered 503. 0 disables the budget.
+    'REQUEST_TIMEOUT_SECONDS': float(os.getenv('YANEZ_REQUEST_TIMEOUT_SECONDS', 25)),
+    # Score session persistence: 'off' commits each session in its request;
+    # 'durable' group-commits concurrent sessions and answers once committed;
+    # 'relaxed' group-commits but answers before the commit (a crash can lose
+    # the last WRITE_BEHIND_INTERVAL_MS of sessions)
+    'WRITE_BEHIND': os.getenv('YANEZ_WRITE_BEHIND', 'off'),
+    'WRITE_BEHIND_INTERVAL_MS': float(os.getenv('YANEZ_WRITE_BEHIND_INTERVAL_MS', 50)),
+    'WRITE_BEHIND_MAX_BATCH': int(os.getenv('YANEZ_WRITE_BEHIND_MAX_BATCH', 64)),
+}
+
+
+def preload_scoring():
+    """Import the scoring stack ahead of the first request"""
+    import app.service.cal_score  # noqa: F401
+    import app.utils.reward  # noqa: F401
+    import app.utils.var_modifier  # noqa: F401
+
+
+def create_app(config: dict = None) -> Flask:
+    """
+    Build the Flask application.
+
+    Args:
+        config: Overrides for DEFAULT_CONFIG and any Flask/SQLAlchemy settings
+
+    Returns:
+        The configured Flask app. The scoring stack is imported lazily unless
+        PRELOAD_SCORING is set, and schema creation and the scheduler only run
+        when CREATE_SCHEMA / SCHEDULER_ENABLED are true.
+    """
+    from app.model.score import db, upgrade_schema
+    from app.routes.score import service_bp
+    from app.routes.dashboard import dashboard_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.admin import admin_bp
+    from app.utils import compression, json_provider, metrics, query_log
+
+    app = Flask(__name__, template_folder=os.path.join(PROJECT_ROOT, 'templates'))
+    app.config.update(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
+    if app.config['VARIATION_STORAGE'] not in ('rows', 'packed'):
+        raise ValueError(f"VARIATION_STORAGE must be 'rows' or 'packed', got {app.config['VARIATION_STORAGE']!r}")
+    if app.config['WRITE_BEHIND'] not in ('off', 'durable', 'relaxed'):
+        raise ValueError(f"WRITE_BEHIND must be 'off', 'durable' or 'relaxed', got {app.config['WRITE_BEHIND']!r}")
+
+    json_provider.init_app(app)
+    db.init_app(app)
+    metrics.init_app(app)
+    query_log.init_app(app)
+    # Registered after metrics so the recorded latency includes compression
+    compression.init_app(app)
+    if app.config['CREATE_SCHEMA']:
+        with app.app_context():
+            db.create_all()
+            upgrade_schema()
+
+    app.register_blueprint(service_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(admin_bp)
+
+    if app.config['PRELOAD_SCORING']:
+        preload_scoring()
+
+    if app.config['SCHEDULER_ENABLED']:
+        from app.utils.scheduler import start_scheduler
+        start_scheduler(app)
+
+    return app
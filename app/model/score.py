@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
 from datetime import datetime, timezone
 
 db = SQLAlchemy()
@@ -26,6 +28,10 @@ class NameScore(db.Model):
     final_score = db.Column(db.Float)
     base_score = db.Column(db.Float)
     session_id = db.Column(db.Integer, db.ForeignKey('score_session.id'))
+    # Set instead of VariationScore rows when VARIATION_STORAGE is 'packed' (see app/utils/variation_codec.py)
+    packed_variations = db.Column(db.LargeBinary, nullable=True)
+    # result_key() of the scored input; lets INCREMENTAL_SCORING reuse unchanged names
+    content_hash = db.Column(db.String(40), nullable=True)
     variations = db.relationship('VariationScore', backref='name_score', cascade="all, delete-orphan")
 
 class VariationScore(db.Model):
@@ -34,4 +40,43 @@ class VariationScore(db.Model):
     phonetic_score = db.Column(db.Float)
     orthographic_score = db.Column(db.Float)
     name_part = db.Column(db.String(128))
-    name_id = db.Column(db.Integer, db.ForeignKey('name_score.id'))
\ No newline at end of file
+    name_id = db.Column(db.Integer, db.ForeignKey('name_score.id'))
+
+class IdempotencyKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), unique=True, nullable=False)
+    # SHA-256 of the request body; a reused key with a different body is rejected
+    request_hash = db.Column(db.String(64), nullable=False)
+    # 'pending' while the first request runs, 'done' once its response is stored
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    status_code = db.Column(db.Integer)
+    mimetype = db.Column(db.String(128))
+    response_body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+def upgrade_schema():
+    """
+    Add nullable columns that exist on the models but not yet in the database.
+
+    db.create_all() only creates missing tables, so databases created before a
+    column was added need this. Must run inside an app context.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            try:
+                with db.engine.begin() as conn:
+                    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                print(f"Added column {table.name}.{column.name}")
+            except OperationalError:
+                # Another worker starting at the same time may have added it first
+                if column.name not in {c['name'] for c in inspect(db.engine).get_columns(table.name)}:
+                    raise
@@ -0,0 +1,30 @@
+import logging
+from flask import Blueprint, jsonify, request
+from app.service.auth import require_api_key
+from app.utils.query_log import get_slow_queries, clear_slow_queries
+
+log = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/yanez/admin')
+
+@admin_bp.route('/slow_queries', methods=['GET'])
+@require_api_key
+def slow_queries():
+    """
+    Slow SQL statements recorded by this worker, newest first.
+    Pass limit=<n> to cap the list and full_scan=1 to keep only full table scans.
+    """
+    limit = request.args.get('limit', None, type=int)
+    entries = get_slow_queries()
+    if request.args.get('full_scan') in ('1', 'true'):
+        entries = [entry for entry in entries if entry['full_scan']]
+    if limit:
+        entries = entries[:limit]
+    return jsonify({'status': True, 'count': len(entries), 'slow_queries': entries})
+
+@admin_bp.route('/slow_queries', methods=['DELETE'])
+@require_api_key
+def reset_slow_queries():
+    clear_slow_queries()
+    log.info("Slow query log cleared")
+    return jsonify({'status': True})
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from app.service.auth import require_api_key
+from app.utils.metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@require_api_key
+def metrics():
+    """Prometheus text exposition of this worker's metrics (scrapers can pass ?api_key=)"""
+    return Response(REGISTRY.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,10 +1,17 @@
 import logging
-from flask import Blueprint, jsonify, request
-from app.service.cal_score import calculate_variation_scores
-from app.model.score import db, ScoreSession, NameScore, VariationScore, UserUID, AverageScore
-import numpy as np
+from flask import Blueprint, current_app, g, jsonify, request
+from app.model.score import db, ScoreSession, NameScore, UserUID, AverageScore
 from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from app.service.admission import MAX_BODY_BYTES, AdmissionRejected, admission_controlled, rate_limited_by_uid
 from app.service.auth import require_api_key
+from app.service.idempotency import idempotent
+from app.service.ingest import BodyTooLarge, StreamedSubmission, is_streamed_request, request_body_stream, streams_json_body
+from app.service.persistence import SessionNotPersisted, save_score_session, session_record
+from app.service.profiling import profiled, get_profile, list_profiles
+from app.utils.deadline import Deadline
+from app.utils.metrics import SCORING_STAGE
+from app.utils.variation_codec import unpack_variations
 
 # Setup logging config
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
@@ -12,60 +19,144 @@ log = logging.getLogger(__name__)
 
 service_bp = Blueprint('service', __name__, url_prefix='/api')
 
+# Levels of GET /api/yanez/score detail, shallowest first
+DETAIL_DEPTHS = ('session', 'names', 'variations')
+
+def parse_detail_depth(value: str):
+    """
+    Resolve the depth/fields query parameter to a detail level.
+
+    Accepts one level or a comma-separated list (the deepest one wins);
+    missing means the full 'variations' tree. Returns None if invalid.
+    """
+    if not value:
+        return 'variations'
+    levels = [level.strip().lower() for level in value.split(',') if level.strip()]
+    if not levels or any(level not in DETAIL_DEPTHS for level in levels):
+        return None
+    return max(levels, key=DETAIL_DEPTHS.index)
+
+def name_variations(name_score: NameScore) -> list:
+    """A stored name's variation scores (with name_part), from either storage layout"""
+    if name_score.packed_variations is not None:
+        return unpack_variations(name_score.packed_variations)
+    return [
+        {
+            'variation': var.variation,
+            'phonetic_score': var.phonetic_score,
+            'orthographic_score': var.orthographic_score,
+            'name_part': var.name_part
+        } for var in name_score.variations
+    ]
+
+def load_previous_results(user_id: int) -> dict:
+    """
+    Stored scores of the names in a user's latest session, for incremental scoring.
+
+    Returns:
+        (final_score, metrics) keyed by NameScore.content_hash, with metrics shaped
+        like calculate_variation_quality() output as far as persistence needs
+        (scores and per-part variations). Names saved without a hash are skipped.
+    """
+    latest = (
+        ScoreSession.query
+        .filter_by(user_id=user_id)
+        .order_by(ScoreSession.created_at.desc())
+        .options(load_only(ScoreSession.id), selectinload(ScoreSession.names).selectinload(NameScore.variations))
+        .first()
+    )
+    if not latest:
+        return {}
+    results = {}
+    for name_score in latest.names:
+        if not name_score.content_hash:
+            continue
+        variations = name_variations(name_score)
+        metrics = {'final_score': name_score.final_score, 'base_score': name_score.base_score}
+        for part in ('first', 'last'):
+            part_variations = [
+                {key: var[key] for key in ('variation', 'phonetic_score', 'orthographic_score')}
+                for var in variations if var['name_part'] == part
+            ]
+            if part == 'first' or part_variations:
+                metrics[f'{part}_name'] = {'metrics': {'variations': part_variations}}
+        results[name_score.content_hash] = (name_score.final_score, metrics)
+    return results
+
 @service_bp.route('/yanez/score', methods=['POST'])
 @require_api_key
+@idempotent
+@admission_controlled
+@profiled
+@rate_limited_by_uid
+@streams_json_body
 def input_score():
     log.info("POST /yanez/score accessed")
+    # Started before any work so the budget covers the whole request
+    deadline_seconds = current_app.config['SCORING_DEADLINE_SECONDS']
+    deadline = Deadline(deadline_seconds if deadline_seconds and deadline_seconds > 0 else None)
+    timeout_seconds = current_app.config['REQUEST_TIMEOUT_SECONDS']
+    request_deadline = Deadline(timeout_seconds if timeout_seconds and timeout_seconds > 0 else None)
     try:
-        data = request.json
-        uid = data.get('uid', 0)
-        variation_config = data.get('variation_config', {})
-        variation_result = data.get('variation_result', {})
+        if is_streamed_request():
+            # Names are scored as they are parsed, so the body is never held whole
+            submission = StreamedSubmission(request_body_stream(MAX_BODY_BYTES))
+            uid = submission.fields.get('uid', 0)
+            g.streamed_admission.admit_uid(uid)
+            variation_config = submission.fields.get('variation_config', {})
+            variation_result = g.streamed_admission.admit_entries(submission.names())
+        else:
+            data = request.json
+            uid = data.get('uid', 0)
+            variation_config = data.get('variation_config', {})
+            variation_result = data.get('variation_result', {})
         log.info(f"Received score submission from UID: {uid}")
-        user = UserUID.query.filter_by(uid=uid).first()
-        if not user:
-            user = UserUID(uid=uid)
-            db.session.add(user)
-            db.session.flush()
-            log.info(f"Created new UserUID for uid: {uid}")
-        variations_scores = calculate_variation_scores(variation_result, variation_config)
-        session = ScoreSession(user_id=user.id, avg_final_score=variations_scores['average_final_score'])
-        db.session.add(session)
-        db.session.flush()
-        for name, scores_detail in variations_scores['scores_data'].items():
-            name_score = NameScore(name=name, final_score=scores_detail['final_score'], base_score=scores_detail['base_score'], session_id=session.id)
-            db.session.add(name_score)
-            db.session.flush()
-            first_name_variations = scores_detail['first_name']['metrics']['variations']
-            for var in first_name_variations:
-                variation_score = VariationScore(
-                    variation=var['variation'],
-                    phonetic_score=var['phonetic_score'],
-                    orthographic_score=var['orthographic_score'],
-                    name_part='first',
-                    name_id=name_score.id
-                )
-                db.session.add(variation_score)
-                
-            if scores_detail.get('last_name', {}):
-                last_name_variations = scores_detail.get('last_name', {}).get('metrics', {}).get('variations', [])
-                for var in last_name_variations:
-                    variation_score = VariationScore(
-                        variation=var['variation'],
-                        phonetic_score=var['phonetic_score'],
-                        orthographic_score=var['orthographic_score'],
-                        name_part='last',
-                        name_id=name_score.id
-                        )
-                    db.session.add(variation_score)
-        db.session.commit()
+        # Imported here so the scoring stack stays out of worker startup
+        from app.service.cal_score import calculate_variation_scores
+        previous_results = None
+        if current_app.config['INCREMENTAL_SCORING']:
+            user = UserUID.query.filter_by(uid=uid).first()
+            if user:
+                previous_results = load_previous_results(user.id)
+        variations_scores = calculate_variation_scores(variation_result, variation_config, previous_results, deadline)
+        unscored_names = variations_scores['unscored_names']
+        if unscored_names:
+            log.warning(f"Scoring deadline exceeded for UID {uid}, {len(unscored_names)} names left unscored")
+            if not variations_scores['scores_data']:
+                # Nothing was scored; a 0.0 session would only drag down the uid's averages
+                db.session.rollback()
+                response = jsonify({"status": False, "message": "Scoring deadline exceeded before any name was scored"})
+                response.status_code = 503
+                response.headers['Retry-After'] = '1'
+                return response
+        content_hashes = variations_scores['content_hashes']
+        if previous_results:
+            reused = sum(1 for key in content_hashes.values() if key in previous_results)
+            log.info(f"Reused {reused}/{len(content_hashes)} unchanged names from UID {uid}'s previous session")
+        with SCORING_STAGE.time(stage='persistence'):
+            save_score_session(current_app._get_current_object(), session_record(uid, variations_scores), request_deadline)
         log.info(f"Scores for UID {uid} successfully saved")
         return jsonify({
             "status": True, 
             "data": {
-                'Average Final Score': variations_scores['average_final_score']
+                'Average Final Score': variations_scores['average_final_score'],
+                'Unscored Names': unscored_names
             }
         })
+    except (AdmissionRejected, BodyTooLarge):
+        # Answered by admission_controlled
+        db.session.rollback()
+        raise
+    except SessionNotPersisted as e:
+        log.warning(f"Score session for UID {uid} not saved in time: {e}")
+        response = jsonify({"status": False, "message": str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    except ValueError as e:
+        log.warning(f"Rejected score submission: {e}")
+        db.session.rollback()
+        return jsonify({"status": False, "message": str(e)}), 400
     except Exception as e:
         log.error(f"Error in input_score: {e}", exc_info=True)
         db.session.rollback()
@@ -80,6 +171,9 @@ def get_score():
         page = request.args.get('page', 1, type=int)
         size = request.args.get('size', 10, type=int)
         size = min(size, 100)
+        depth = parse_detail_depth(request.args.get('depth') or request.args.get('fields'))
+        if depth is None:
+            return jsonify({'status': False, 'message': f"Invalid depth, expected one of {', '.join(DETAIL_DEPTHS)}"}), 400
         now = datetime.now(timezone.utc)
         one_hour_ago = now - timedelta(hours=1)
         if not uid_value:
@@ -103,7 +197,9 @@ def get_score():
             return jsonify({'status': False, 'message': 'UID not found'}), 404
 
         # a. Score rata-rata 1 jam terakhir
-        sessions_1hr = ScoreSession.query.filter(
+        sessions_1hr = ScoreSession.query.options(
+            load_only(ScoreSession.avg_final_score, ScoreSession.created_at)
+        ).filter(
             ScoreSession.user_id == user.id,
             ScoreSession.created_at >= one_hour_ago,
             ScoreSession.created_at <= now
@@ -115,45 +211,60 @@ def get_score():
         latest_1hr_score = latest_1hr.avg_final_score if latest_1hr else None
         latest_1hr_created = latest_1hr.created_at.isoformat() if latest_1hr else None
 
-        # c. Table detail session, name, variations
-        sessions_query = ScoreSession.query.filter_by(user_id=user.id).order_by(ScoreSession.created_at.desc())
-        total_sessions = sessions_query.count()
+        # c. Table detail session, name, variations (only as deep as requested)
+        session_columns = load_only(ScoreSession.id, ScoreSession.avg_final_score, ScoreSession.created_at)
+        if depth == 'session':
+            detail_options = [session_columns, raiseload(ScoreSession.names)]
+        elif depth == 'names':
+            detail_options = [
+                session_columns,
+                selectinload(ScoreSession.names)
+                .load_only(NameScore.id, NameScore.name, NameScore.final_score, NameScore.base_score, NameScore.session_id)
+                .raiseload(NameScore.variations)
+            ]
+        else:
+            detail_options = [
+                session_columns,
+                selectinload(ScoreSession.names).selectinload(NameScore.variations)
+            ]
+        sessions_query = (
+            ScoreSession.query
+            .filter_by(user_id=user.id)
+            .order_by(ScoreSession.created_at.desc())
+            .options(*detail_options)
+        )
         paginated_sessions = sessions_query.paginate(
             page=page,
             per_page=size,
             error_out=False
         )
+        total_sessions = paginated_sessions.total
         detail_sessions = []
         for session in paginated_sessions.items:
             session_data = {
                 'session_id': session.id,
                 'avg_final_score': session.avg_final_score,
-                'created_at': session.created_at.isoformat(),
-                'names': []
+                'created_at': session.created_at.isoformat()
             }
-            for name_score in session.names:
-                first_name_vars = [var for var in name_score.variations if var.name_part == 'first']
-                last_name_vars = [var for var in name_score.variations if var.name_part == 'last']
-                name_data = {
-                    'name': name_score.name,
-                    'final_score': name_score.final_score,
-                    'base_score': name_score.base_score,
-                    'first_name_variations': [
-                        {
-                            'variation': var.variation,
-                            'phonetic_score': var.phonetic_score,
-                            'orthographic_score': var.orthographic_score
-                        } for var in first_name_vars
-                    ],
-                    'last_name_variations': [
-                        {
-                            'variation': var.variation,
-                            'phonetic_score': var.phonetic_score,
-                            'orthographic_score': var.orthographic_score
-                        } for var in last_name_vars
-                    ]
-                }
-                session_data['names'].append(name_data)
+            if depth != 'session':
+                session_data['names'] = []
+                for name_score in session.names:
+                    name_data = {
+                        'name': name_score.name,
+                        'final_score': name_score.final_score,
+                        'base_score': name_score.base_score
+                    }
+                    if depth == 'variations':
+                        variations = name_variations(name_score)
+                        for part in ('first', 'last'):
+                            name_data[f'{part}_name_variations'] = [
+                                {
+                                    'variation': var['variation'],
+                                    'phonetic_score': var['phonetic_score'],
+                                    'orthographic_score': var['orthographic_score']
+                                } for var in variations if var['name_part'] == part
+                            ]
+                    session_data['names'].append(name_data)
             detail_sessions.append(session_data)
         pagination_info = {
             'current_page': page,
@@ -182,6 +293,8 @@ def get_score():
 
 @service_bp.route('/yanez/modify_variations', methods=['POST'])
 @require_api_key
+@admission_controlled
+@profiled
 def modify_variations():
     """
     Modify variations to match configuration requirements without calculating scores.
@@ -238,3 +351,19 @@ def get_avg_score(uid):
     except Exception as e:
         log.error(f"Error in get_avg_score: {e}", exc_info=True)
         return jsonify({'status': False, 'message': str(e)}), 500
+
+@service_bp.route('/yanez/profile', methods=['GET'])
+@require_api_key
+def get_profiles():
+    """
+    List profiles of requests sent with X-Profile: 1 (or ?profile=1), newest first.
+    """
+    return jsonify({'status': True, 'profiles': list_profiles()})
+
+@service_bp.route('/yanez/profile/<string:profile_id>', methods=['GET'])
+@require_api_key
+def get_profile_report(profile_id):
+    report = get_profile(profile_id)
+    if not report:
+        return jsonify({'status': False, 'message': 'Profile not found'}), 404
+    return jsonify({'status': True, 'profile': report})
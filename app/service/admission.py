@@ -0,0 +1,276 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Iterator, Tuple
+from flask import g, jsonify, request
+from app.service.ingest import BodyTooLarge, is_streamed_request
+from app.utils.metrics import ADMISSION_REJECTIONS, REGISTRY
+
+# Any cap set to 0 (or below) is disabled
+MAX_BODY_BYTES = int(os.getenv('YANEZ_MAX_BODY_BYTES', 10 * 1024 * 1024))
+MAX_NAMES = int(os.getenv('YANEZ_MAX_NAMES', 200))
+MAX_VARIATIONS_PER_NAME = int(os.getenv('YANEZ_MAX_VARIATIONS_PER_NAME', 1000))
+# Request cost is the sum over names of variations², since the uniqueness check is quadratic
+MAX_REQUEST_COST = int(os.getenv('YANEZ_MAX_REQUEST_COST', 2_000_000))
+# Per-process load shedding: concurrent scoring requests and their summed cost
+MAX_IN_FLIGHT = int(os.getenv('YANEZ_MAX_IN_FLIGHT', 16))
+MAX_IN_FLIGHT_COST = int(os.getenv('YANEZ_MAX_IN_FLIGHT_COST', 4_000_000))
+SHED_RETRY_AFTER_SECONDS = 1
+# Per-uid token bucket (per process), on views marked with rate_limited_by_uid
+RATE_LIMIT_PER_MINUTE = float(os.getenv('YANEZ_RATE_LIMIT_PER_MINUTE', 120))
+RATE_LIMIT_BURST = int(os.getenv('YANEZ_RATE_LIMIT_BURST', 30))
+RATE_LIMIT_MAX_KEYS = 10000
+
+
+class AdmissionRejected(Exception):
+    """Raised while a streamed body is parsed; admission_controlled turns it into the rejection response"""
+
+    def __init__(self, reason: str, status_code: int, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _variation_count(variations) -> int:
+    return len(variations) if isinstance(variations, list) else 1
+
+
+def estimate_cost(variation_result) -> Tuple[int, int, int]:
+    """
+    Estimate the scoring cost of a variation_result without scoring it.
+
+    Returns:
+        (name count, largest variation count for one name, sum of variation counts squared);
+        zeros for malformed input, which the route itself rejects
+    """
+    if not isinstance(variation_result, dict):
+        return 0, 0, 0
+    largest = 0
+    cost = 0
+    for variations in variation_result.values():
+        count = _variation_count(variations)
+        largest = max(largest, count)
+        cost += max(1, count * count)
+    return len(variation_result), largest, cost
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per key, refilled at rate_per_minute up to burst tokens.
+
+    Buckets of the least recently seen keys are dropped beyond max_keys; a
+    dropped key simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate_per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Take a token for key; returns 0 when allowed, otherwise the seconds until one is available"""
+        if self.rate_per_minute <= 0:
+            return 0.0
+        rate = self.rate_per_minute / 60.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+RATE_LIMITER = TokenBucketLimiter()
+
+_in_flight = {'requests': 0, 'cost': 0}
+_in_flight_lock = threading.Lock()
+
+REGISTRY.register_callback(
+    'yanez_admission_in_flight', 'Scoring requests currently admitted and their estimated cost', 'gauge',
+    ('kind',), 'admission', lambda: {(kind,): value for kind, value in _in_flight.items()}
+)
+
+
+def _try_admit(cost: int) -> bool:
+    with _in_flight_lock:
+        # A lone request is always admitted, so one above the in-flight budget can still run
+        if _in_flight['requests'] and (
+            (MAX_IN_FLIGHT > 0 and _in_flight['requests'] >= MAX_IN_FLIGHT)
+            or (MAX_IN_FLIGHT_COST > 0 and _in_flight['cost'] + cost > MAX_IN_FLIGHT_COST)
+        ):
+            return False
+        _in_flight['requests'] += 1
+        _in_flight['cost'] += cost
+        return True
+
+
+def _charge(cost: int):
+    with _in_flight_lock:
+        _in_flight['cost'] += cost
+
+
+def _release(cost: int):
+    with _in_flight_lock:
+        _in_flight['requests'] -= 1
+        _in_flight['cost'] -= cost
+
+
+def rate_limited_by_uid(f):
+    """Mark a view whose requests take a token from their uid's bucket; admission_controlled only limits marked views"""
+    f.rate_limited_by_uid = True
+    return f
+
+
+def _rate_limit_wait(uid) -> float:
+    """Seconds until uid may submit again, 0 when allowed"""
+    return RATE_LIMITER.acquire(f"uid:{uid}")
+
+
+class StreamedAdmission:
+    """
+    Admission checks for a streamed body, applied as its fields and names are parsed.
+
+    The view calls admit_uid() once the uid is known and scores the names
+    through admit_entries(); both raise AdmissionRejected on the same limits
+    admission_controlled applies to a parsed body. Each admitted name's cost
+    is added to the in-flight cost as it arrives.
+    """
+
+    def __init__(self, rate_limited: bool = True):
+        self.rate_limited = rate_limited
+        self.names = 0
+        self.cost = 0
+
+    def admit_uid(self, uid):
+        if not self.rate_limited:
+            return
+        wait = _rate_limit_wait(uid)
+        if wait > 0:
+            raise AdmissionRejected('rate_limited', 429, "Rate limit exceeded for this uid", wait)
+
+    def admit_entries(self, entries: Iterator[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        for name, variations in entries:
+            count = _variation_count(variations)
+            cost = max(1, count * count)
+            self.names += 1
+            if MAX_NAMES > 0 and self.names > MAX_NAMES:
+                raise AdmissionRejected('names', 413, f"Too many names: more than {MAX_NAMES}")
+            if MAX_VARIATIONS_PER_NAME > 0 and count > MAX_VARIATIONS_PER_NAME:
+                raise AdmissionRejected('variations', 413, f"Too many variations for one name: {count} (limit {MAX_VARIATIONS_PER_NAME})")
+            if MAX_REQUEST_COST > 0 and self.cost + cost > MAX_REQUEST_COST:
+                raise AdmissionRejected('cost', 413, f"Request too expensive to score: cost above {MAX_REQUEST_COST}")
+            self.cost += cost
+            _charge(cost)
+            yield name, variations
+
+
+def _reject(reason: str, status_code: int, message: str, retry_after: float = None):
+    ADMISSION_REJECTIONS.inc(endpoint=request.endpoint, reason=reason)
+    response = jsonify({'status': False, 'message': message})
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def body_too_large():
+    """413 for a body over MAX_BODY_BYTES, counted like the other admission rejections"""
+    return _reject('body_size', 413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+
+
+def check_body_size(streams_body: bool = False):
+    """
+    Refuse an oversized body from its headers, before anything reads it.
+
+    Returns a 413 when Content-Length exceeds MAX_BODY_BYTES, and a 411 for a
+    body without Content-Length (chunked) on a view that would buffer it whole;
+    None when the body may be read. Bodies of streams_json_body views are read
+    through a LimitedReader, which enforces the cap as the bytes arrive.
+    """
+    if MAX_BODY_BYTES <= 0:
+        return None
+    if request.content_length is None:
+        if request.headers.get('Transfer-Encoding') and not streams_body:
+            return _reject('body_size', 411, "Content-Length is required")
+        return None
+    if request.content_length > MAX_BODY_BYTES:
+        return body_too_large()
+    return None
+
+
+def admission_controlled(f):
+    """
+    Refuse scoring requests that are too large, too frequent or arrive while the worker is saturated.
+
+    Apply below idempotent, so replayed responses and requests waiting on an
+    in-flight duplicate take no tokens or in-flight slots. In order:
+    - 413 (or 411) from check_body_size, before the body is read;
+    - 413 when the name count, variations per name or estimated cost exceed their caps;
+    - 429 with Retry-After when the uid's token bucket is empty, on views
+      marked rate_limited_by_uid (the uid defaults to 0, as in the view);
+    - 503 with Retry-After when MAX_IN_FLIGHT requests, or MAX_IN_FLIGHT_COST of
+      estimated cost, are already being scored in this process.
+
+    On a view marked streams_json_body, a streamed body is not parsed here:
+    the view applies the checks through g.streamed_admission while it reads the
+    body, and any AdmissionRejected it raises becomes the same response. The
+    body is read capped at MAX_BODY_BYTES; BodyTooLarge becomes the 413.
+    """
+    streams_body = getattr(f, 'streams_json_body', False)
+    rate_limited = getattr(f, 'rate_limited_by_uid', False)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        rejected = check_body_size(streams_body)
+        if rejected is not None:
+            return rejected
+
+        if streams_body and is_streamed_request():
+            if not _try_admit(0):
+                return _reject('overloaded', 503, "Server is busy, retry later", SHED_RETRY_AFTER_SECONDS)
+            admission = g.streamed_admission = StreamedAdmission(rate_limited)
+            try:
+                return f(*args, **kwargs)
+            except AdmissionRejected as e:
+                return _reject(e.reason, e.status_code, str(e), e.retry_after)
+            except BodyTooLarge:
+                return body_too_large()
+            finally:
+                _release(admission.cost)
+
+        data = request.get_json(silent=True)
+        data = data if isinstance(data, dict) else {}
+        names, largest, cost = estimate_cost(data.get('variation_result'))
+        if MAX_NAMES > 0 and names > MAX_NAMES:
+            return _reject('names', 413, f"Too many names: {names} (limit {MAX_NAMES})")
+        if MAX_VARIATIONS_PER_NAME > 0 and largest > MAX_VARIATIONS_PER_NAME:
+            return _reject('variations', 413, f"Too many variations for one name: {largest} (limit {MAX_VARIATIONS_PER_NAME})")
+        if MAX_REQUEST_COST > 0 and cost > MAX_REQUEST_COST:
+            return _reject('cost', 413, f"Request too expensive to score: cost {cost} (limit {MAX_REQUEST_COST})")
+
+        if rate_limited:
+            wait = _rate_limit_wait(data.get('uid', 0))
+            if wait > 0:
+                return _reject('rate_limited', 429, "Rate limit exceeded for this uid", wait)
+
+        if not _try_admit(cost):
+            return _reject('overloaded', 503, "Server is busy, retry later", SHED_RETRY_AFTER_SECONDS)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _release(cost)
+    return decorated
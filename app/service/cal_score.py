@@ -1,31 +1,133 @@
+import hashlib
 import json
 import random
 import re
-from typing import Dict, List, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Tuple, Union
 import numpy as np
 import os
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.metrics import register_lru_cache
 
-def calculate_variation_scores(data: dict, variation_config: dict) -> dict:
+# Number of distinct variation_config payloads kept parsed across requests
+SCORING_CONFIG_CACHE_SIZE = 256
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """
+    Validated scoring settings parsed once from a request's variation_config.
+
+    Instances are shared between requests with the same config, so treat every
+    field (including the dicts) as read-only.
+    """
+    phonetic_similarity: Dict[str, float]
+    orthographic_similarity: Dict[str, float]
+    phonetic_bands: Tuple[Tuple[str, float, float, float], ...]
+    orthographic_bands: Tuple[Tuple[str, float, float, float], ...]
+    expected_count: int
+    rule_based: Dict[str, Any]
+    fingerprint: str
+
+    @classmethod
+    def from_variation_config(cls, variation_config: dict) -> "ScoringConfig":
+        """Parse and validate a variation_config, reusing the cached result for a known config"""
+        if not isinstance(variation_config, dict):
+            raise ValueError("Invalid variation_config: expected an object")
+        try:
+            canonical = json.dumps(variation_config, sort_keys=True, separators=(',', ':'))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid variation_config: {e}")
+        return _parse_scoring_config(canonical)
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _parse_similarity_distribution(variation_config: dict, key: str) -> Dict[str, float]:
+    distribution = variation_config.get(key)
+    if not isinstance(distribution, dict):
+        raise ValueError(f"Invalid variation_config: '{key}' must be an object")
+    targets = {}
+    for level, spec in distribution.items():
+        if not isinstance(spec, dict) or not _is_number(spec.get('percentage')) or spec['percentage'] < 0:
+            raise ValueError(f"Invalid variation_config: '{key}.{level}.percentage' must be a non-negative number")
+        targets[level.capitalize()] = spec['percentage']
+    return targets
+
+@lru_cache(maxsize=SCORING_CONFIG_CACHE_SIZE)
+def _parse_scoring_config(canonical: str) -> ScoringConfig:
+    from app.utils.reward import build_similarity_bands, PHONETIC_BOUNDARIES, ORTHOGRAPHIC_BOUNDARIES
+    variation_config = json.loads(canonical)
+
+    phonetic_similarity = _parse_similarity_distribution(variation_config, 'phonetic_similarity_distribution')
+    orthographic_similarity = _parse_similarity_distribution(variation_config, 'orthographic_similarity_distribution')
+
+    expected_count = variation_config.get('variation_per_seed_name')
+    if not _is_number(expected_count) or expected_count <= 0:
+        raise ValueError("Invalid variation_config: 'variation_per_seed_name' must be a positive number")
+
+    if 'rule_transformation' not in variation_config:
+        raise ValueError("Invalid variation_config: 'rule_transformation' is required")
+    rule_based = variation_config['rule_transformation']
+    if rule_based is not None and not isinstance(rule_based, dict):
+        raise ValueError("Invalid variation_config: 'rule_transformation' must be an object")
+    if rule_based and "selected_rules" in rule_based:
+        selected_rules = rule_based["selected_rules"]
+        if not isinstance(selected_rules, list) or not all(isinstance(rule, str) for rule in selected_rules):
+            raise ValueError("Invalid variation_config: 'rule_transformation.selected_rules' must be a list of rule names")
+        if not _is_number(rule_based.get("rule_percentage", 30)):
+            raise ValueError("Invalid variation_config: 'rule_transformation.rule_percentage' must be a number")
+
+    return ScoringConfig(
+        phonetic_similarity=phonetic_similarity,
+        orthographic_similarity=orthographic_similarity,
+        phonetic_bands=build_similarity_bands(PHONETIC_BOUNDARIES, phonetic_similarity),
+        orthographic_bands=build_similarity_bands(ORTHOGRAPHIC_BOUNDARIES, orthographic_similarity),
+        expected_count=expected_count,
+        rule_based=rule_based,
+        fingerprint=hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    )
+
+register_lru_cache("scoring_config", _parse_scoring_config)
+
+def calculate_variation_scores(data: Union[dict, Iterator[Tuple[str, Any]]], variation_config: dict, previous_results: Dict[str, Tuple[float, dict]] = None,
+                               deadline: Deadline = None) -> dict:
         """
         Calculate scores for name variations and filter based on quality.
         
         Args:
-            data: Dictionary of names and their variations
+            data: Dictionary of names and their variations, or an iterator of
+                (name, variations) pairs consumed as it is scored (streamed bodies)
+            variation_config: Similarity distributions, expected count and rules;
+                rejected with ValueError before any name is scored if invalid
+            previous_results: Optional (final_score, metrics) of earlier scored names keyed
+                by result_key(); matching names are reused instead of rescored
+            deadline: Optional Deadline; names not finished by then are skipped and
+                listed under 'unscored_names' (reused results are still served)
             
         Returns:
-            Filtered dictionary containing only valid variations with good scores
+            Filtered dictionary containing only valid variations with good scores,
+            plus the result_key() of every scored name under 'content_hashes'
         """
         from app.utils.reward import calculate_variation_quality
+        from app.utils.metrics import CACHE_LOOKUPS, UNSCORED_NAMES, VARIATIONS_SCORED
+        from app.service.result_store import RESULT_STORE, result_key
         filtered_data = {}
         scores_data = {}
         final_scores = []
+        content_hashes = {}
+        unscored_names = []
 
         # Validate input structure
-        if not isinstance(data, dict) or not data:
+        streamed = isinstance(data, Iterator)
+        if not streamed and (not isinstance(data, dict) or not data):
             raise ValueError("Invalid or empty data structure")
+        config = ScoringConfig.from_variation_config(variation_config)
 
         # Process each name and variations
-        for name, variations in data.items():
+        name_count = 0
+        for name, variations in (data if streamed else data.items()):
+            name_count += 1
             if not name or not isinstance(name, str):
                 print(f"Skipping invalid name: {name}")
                 continue
@@ -40,30 +142,47 @@ def calculate_variation_scores(data: dict, variation_config: dict) -> dict:
 
             if variations:
                 try:
-                    # Get similarity configurations
-                    phonetic_similarity = {
-                        k.capitalize(): v['percentage'] 
-                        for k, v in variation_config['phonetic_similarity_distribution'].items()
-                    }
-                    orthographic_similarity = {
-                        k.capitalize(): v['percentage'] 
-                        for k, v in variation_config['orthographic_similarity_distribution'].items()
-                    }
-
-                    # Calculate quality metrics
-                    final_score, metrics = calculate_variation_quality(
-                        name,
-                        variations,
-                        phonetic_similarity,
-                        orthographic_similarity,
-                        variation_config['variation_per_seed_name'],
-                        variation_config['rule_transformation']
-                    )
+                    key = result_key(config.fingerprint, name, variations)
+                    if previous_results is not None:
+                        # Unchanged since the uid's previous session: keep the stored scores
+                        previous = previous_results.get(key)
+                        CACHE_LOOKUPS.inc(cache='incremental', result='hit' if previous is not None else 'miss')
+                        if previous is not None:
+                            final_score, metrics = previous
+                            filtered_data[name] = variations
+                            scores_data[name] = metrics
+                            final_scores.append(final_score)
+                            content_hashes[name] = key
+                            print(f"\nReused scores for '{name}' from the previous session (final score {final_score:.3f})")
+                            continue
+                    # Reuse the metrics of an identical earlier submission
+                    stored = RESULT_STORE.get(key)
+                    if stored is not None:
+                        final_score, metrics = stored
+                    else:
+                        if deadline is not None and deadline.expired:
+                            unscored_names.append(name)
+                            continue
+                        VARIATIONS_SCORED.inc(len(variations))
+                        # Calculate quality metrics
+                        final_score, metrics = calculate_variation_quality(
+                            name,
+                            variations,
+                            config.phonetic_similarity,
+                            config.orthographic_similarity,
+                            config.expected_count,
+                            config.rule_based,
+                            phonetic_bands=config.phonetic_bands,
+                            orthographic_bands=config.orthographic_bands,
+                            deadline=deadline
+                        )
+                        RESULT_STORE.put(key, final_score, metrics)
 
                     if final_score > 0.0 and metrics:
                         filtered_data[name] = variations
                         scores_data[name] = metrics
                         final_scores.append(final_score)
+                        content_hashes[name] = key
                         similarity = metrics.get('first_name', {}).get('metrics', {}).get('similarity', 0.0)
 
                         # Log metrics
@@ -77,13 +196,24 @@ def calculate_variation_scores(data: dict, variation_config: dict) -> dict:
                         print(f"Rule Compliance Score: {metrics.get('rule_compliance', {}).get('score', 0):.3f}")
                         print("===============================================")
 
+                except DeadlineExceeded:
+                    print(f"Scoring deadline exceeded while scoring '{name}'")
+                    unscored_names.append(name)
+                    continue
                 except Exception as e:
                     print(f"Error calculating scores for {name}: {str(e)}")
                     continue
+        if not name_count:
+            raise ValueError("Invalid or empty data structure")
+        if unscored_names:
+            UNSCORED_NAMES.inc(len(unscored_names))
+            print(f"Deadline exceeded, {len(unscored_names)} names left unscored: {unscored_names}")
         avg_final_score = np.mean(final_scores) if final_scores else 0.0
         print(f"Average final score across all names: {avg_final_score}")
         return {
             "scores_data": scores_data,
             "final_scores": final_scores,
-            "average_final_score": np.mean(final_scores) if final_scores else 0.0
+            "average_final_score": np.mean(final_scores) if final_scores else 0.0,
+            "content_hashes": content_hashes,
+            "unscored_names": unscored_names
         }
\ No newline at end of file
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Optional
+from flask import jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+from app.model.score import db, IdempotencyKey
+from app.service.admission import MAX_BODY_BYTES, body_too_large, check_body_size
+from app.service.ingest import BodyTooLarge, discard_spooled_body, is_streamed_request, spool_request_body
+from app.utils.metrics import CACHE_LOOKUPS
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Stored responses are replayed for this long, then purged by the scheduler
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('YANEZ_IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+# How long a duplicate waits for the in-flight request before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('YANEZ_IDEMPOTENCY_WAIT_SECONDS', 30))
+# A pending key not finished within this time is assumed abandoned (worker died) and taken over
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = float(os.getenv('YANEZ_IDEMPOTENCY_PENDING_TIMEOUT_SECONDS', 300))
+IDEMPOTENCY_POLL_SECONDS = 0.05
+# Transient refusals (rate limiting, server errors) are not stored, so a retry runs again
+UNSTORED_STATUS_CODES = (429,)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands DateTime columns back naive; they were written in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _claim(key: str, request_hash: str) -> Optional[IdempotencyKey]:
+    """
+    Try to become the request that computes the response for key.
+
+    A poll is a single read while the key's owner is running or done; the key
+    is only written when it is missing or expired (insert) or when a pending
+    owner has not finished within IDEMPOTENCY_PENDING_TIMEOUT_SECONDS (takeover).
+
+    Returns None when this request now owns the key, otherwise the existing record.
+    """
+    now = _utcnow()
+    expired_before = now - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    record = IdempotencyKey.query.filter_by(key=key).first()
+    if record is None or _as_utc(record.created_at) < expired_before:
+        try:
+            if record is not None:
+                # An expired key is free to reuse even if the purge job has not run yet
+                db.session.expunge(record)
+                IdempotencyKey.query.filter(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.created_at < expired_before
+                ).delete(synchronize_session=False)
+            db.session.add(IdempotencyKey(key=key, request_hash=request_hash, status='pending', created_at=now, updated_at=now))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            # Another request claimed it first
+            db.session.rollback()
+            record = IdempotencyKey.query.filter_by(key=key).first()
+            if record is None:
+                # Released again before this read; try again
+                db.session.rollback()
+                return _claim(key, request_hash)
+
+    stale_before = now - timedelta(seconds=IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+    if (record.status == 'pending' and record.request_hash == request_hash
+            and _as_utc(record.updated_at) < stale_before):
+        # Take over a pending key whose owner has not finished in time; the
+        # conditions are repeated so only one of several waiters wins
+        taken_over = IdempotencyKey.query.filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.request_hash == request_hash,
+            IdempotencyKey.status == 'pending',
+            IdempotencyKey.updated_at < stale_before
+        ).update({'updated_at': now}, synchronize_session=False)
+        db.session.commit()
+        if taken_over:
+            print(f"Took over abandoned idempotency key {key}")
+            return None
+        return _claim(key, request_hash)
+    # Keep the loaded values, then end the read so the next poll sees the owner's commit
+    db.session.expunge(record)
+    db.session.rollback()
+    return record
+
+
+def _finish(key: str, response):
+    """Store a response for replay, or release the key after a transient failure so a retry can run"""
+    db.session.rollback()
+    query = IdempotencyKey.query.filter_by(key=key, status='pending')
+    if response is None or response.status_code >= 500 or response.status_code in UNSTORED_STATUS_CODES:
+        query.delete(synchronize_session=False)
+    else:
+        query.update({
+            'status': 'done',
+            'status_code': response.status_code,
+            'mimetype': response.mimetype,
+            'response_body': response.get_data(),
+            'updated_at': _utcnow(),
+        }, synchronize_session=False)
+    db.session.commit()
+
+
+def _replay(record: IdempotencyKey):
+    response = make_response(record.response_body, record.status_code)
+    response.mimetype = record.mimetype
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """
+    Honour an Idempotency-Key header on a POST view.
+
+    The first request with a key runs the view and stores its response (429 and
+    5xx responses are not stored, so the client can retry). Repeats with the same
+    key and body get the stored response replayed with Idempotent-Replayed set,
+    without running the view. A repeat arriving while the first is still running
+    waits up to IDEMPOTENCY_WAIT_SECONDS for it, then gets 409. Reusing a key
+    with a different body is rejected with 422. Requests without the header are
+    unaffected.
+
+    The body size is checked (check_body_size) before the body is hashed. On a
+    streams_json_body view a streamed body is spooled and hashed chunk by chunk
+    (spool_request_body), never held whole in memory; the view reads the spool.
+    """
+    streams_body = getattr(f, 'streams_json_body', False)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return jsonify({'status': False, 'message': f"{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"}), 400
+        rejected = check_body_size(streams_body)
+        if rejected is not None:
+            return rejected
+        if streams_body and is_streamed_request():
+            try:
+                request_hash = spool_request_body(MAX_BODY_BYTES)
+            except BodyTooLarge:
+                return body_too_large()
+        else:
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        try:
+            return _run_once(f, key, request_hash, *args, **kwargs)
+        finally:
+            discard_spooled_body()
+    return decorated
+
+
+def _run_once(f, key: str, request_hash: str, *args, **kwargs):
+    """Run the view for key unless another request with it already has; see idempotent"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    waited = False
+    while True:
+        record = _claim(key, request_hash)
+        if record is None:
+            break
+        if record.request_hash != request_hash:
+            return jsonify({'status': False, 'message': f"{IDEMPOTENCY_HEADER} was already used for a different request"}), 422
+        if record.status == 'done':
+            CACHE_LOOKUPS.inc(cache='idempotency', result='hit')
+            return _replay(record)
+        if time.monotonic() >= deadline:
+            response = jsonify({'status': False, 'message': f"A request with this {IDEMPOTENCY_HEADER} is still in progress"})
+            response.status_code = 409
+            response.headers['Retry-After'] = str(max(1, int(IDEMPOTENCY_WAIT_SECONDS)))
+            return response
+        if not waited:
+            waited = True
+            print(f"Waiting for in-flight request with idempotency key {key}")
+        time.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+    CACHE_LOOKUPS.inc(cache='idempotency', result='miss')
+    response = None
+    try:
+        response = make_response(f(*args, **kwargs))
+        return response
+    finally:
+        _finish(key, response)
+
+
+def purge_expired_idempotency_keys():
+    """Delete idempotency records older than IDEMPOTENCY_TTL_SECONDS"""
+    cutoff = _utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"Purged {deleted} expired idempotency keys")
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import tempfile
+from collections import deque
+from typing import Any, BinaryIO, Iterator, Tuple
+from flask import g, request
+from app.utils.json_stream import STREAM_CHUNK_SIZE, iter_object_items
+
+# JSON bodies of at least this many bytes on views marked with streams_json_body
+# are parsed incrementally; negative disables streaming for bodies of known length
+STREAM_MIN_BYTES = int(os.getenv('YANEZ_STREAM_MIN_BYTES', 1024 * 1024))
+# A spooled body (see spool_request_body) moves from memory to a temporary file past this size
+SPOOL_MEMORY_BYTES = 1024 * 1024
+# Fields read before the first name is handed out, when they precede variation_result
+SUBMISSION_HEADER_FIELDS = ('uid', 'variation_config')
+
+
+def streams_json_body(f):
+    """Mark a view that reads large JSON bodies with StreamedSubmission, so admission control defers its body checks"""
+    f.streams_json_body = True
+    return f
+
+
+def is_streamed_request() -> bool:
+    """Whether this request's JSON body should be parsed incrementally rather than with request.json"""
+    if not request.is_json:
+        return False
+    if request.content_length is None:
+        # Chunked: reading it through a LimitedReader is the only way to cap its size
+        return True
+    return STREAM_MIN_BYTES >= 0 and request.content_length >= STREAM_MIN_BYTES
+
+
+class BodyTooLarge(Exception):
+    """Raised by LimitedReader once more than its max_bytes have been read"""
+
+
+class LimitedReader:
+    """
+    Binary stream wrapper that counts the bytes read through it.
+
+    Raises BodyTooLarge as soon as more than max_bytes (0 or less: no limit)
+    have been read, and feeds every chunk to hasher when one is given.
+    """
+
+    def __init__(self, stream: BinaryIO, max_bytes: int, hasher=None):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.hasher = hasher
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        self.bytes_read += len(chunk)
+        if 0 < self.max_bytes < self.bytes_read:
+            raise BodyTooLarge(f"Request body exceeds {self.max_bytes} bytes")
+        if self.hasher is not None:
+            self.hasher.update(chunk)
+        return chunk
+
+
+def spool_request_body(max_bytes: int) -> str:
+    """
+    Copy the request body to a temporary spool, hashing it on the way.
+
+    The spool stays in memory up to SPOOL_MEMORY_BYTES, then moves to disk, and
+    request_body_stream() reads it back. Raises BodyTooLarge past max_bytes.
+
+    Returns:
+        SHA-256 hex digest of the body
+    """
+    hasher = hashlib.sha256()
+    reader = LimitedReader(request.stream, max_bytes, hasher)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        while True:
+            chunk = reader.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    g.spooled_body = spool
+    return hasher.hexdigest()
+
+
+def discard_spooled_body():
+    spool = g.pop('spooled_body', None)
+    if spool is not None:
+        spool.close()
+
+
+def request_body_stream(max_bytes: int) -> BinaryIO:
+    """The request body as a binary stream, from the spool if spool_request_body() read it, capped at max_bytes"""
+    spool = g.get('spooled_body')
+    if spool is not None:
+        return spool
+    return LimitedReader(request.stream, max_bytes)
+
+
+class StreamedSubmission:
+    """
+    A scoring submission parsed from a binary stream.
+
+    The fields before variation_result are read on construction; names()
+    then yields the variation_result entries as they are parsed, so only one
+    name's variations are held at a time. That requires the client to send
+    uid and variation_config before variation_result: entries that arrive
+    before them are buffered until they have been read.
+    """
+
+    def __init__(self, stream: BinaryIO, header_fields: Tuple[str, ...] = SUBMISSION_HEADER_FIELDS,
+                 entries_field: str = 'variation_result'):
+        self.fields = {}
+        self._events = iter_object_items(stream, expand=(entries_field,))
+        self._buffered = deque()
+        for parent, key, value in self._events:
+            if parent is None:
+                self.fields[key] = value
+                if all(field in self.fields for field in header_fields):
+                    return
+            else:
+                self._buffered.append((key, value))
+
+    def names(self) -> Iterator[Tuple[str, Any]]:
+        """
+        (name, variations) pairs of variation_result in body order.
+
+        Top-level fields met along the way are added to fields. Raises
+        ValueError for a malformed body or a repeated name, which a dict
+        would have silently collapsed.
+        """
+        seen = set()
+        for name, variations in self._entries():
+            if name in seen:
+                raise ValueError(f"Duplicate name in variation_result: {name!r}")
+            seen.add(name)
+            yield name, variations
+
+    def _entries(self) -> Iterator[Tuple[str, Any]]:
+        while self._buffered:
+            yield self._buffered.popleft()
+        for parent, key, value in self._events:
+            if parent is None:
+                self.fields[key] = value
+            else:
+                yield key, value
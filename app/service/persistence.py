@@ -0,0 +1,231 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+from flask import g
+from app.model.score import db, ScoreSession, NameScore, VariationScore, UserUID
+from app.utils.deadline import Deadline
+from app.utils.metrics import WRITE_BEHIND_BATCH
+from app.utils.variation_codec import pack_variations
+
+# 'off' commits each submission in its request; 'durable' queues it for a group
+# commit and waits for that commit; 'relaxed' queues it and returns at once
+WRITE_BEHIND_MODES = ('off', 'durable', 'relaxed')
+
+
+class SessionNotPersisted(Exception):
+    """A durable request ran out of time before its queued session was written; the session was withdrawn"""
+
+
+def session_record(uid, variations_scores: Dict) -> Dict:
+    """
+    Plain-data description of a scored submission, ready for add_score_session().
+
+    Args:
+        uid: Submitting miner uid
+        variations_scores: calculate_variation_scores() output
+
+    Returns:
+        Dict with 'uid', 'avg_final_score' and one entry per scored name holding its
+        scores, content hash and variation rows (with name_part)
+    """
+    content_hashes = variations_scores.get('content_hashes', {})
+    names = []
+    for name, scores_detail in variations_scores['scores_data'].items():
+        variation_rows = [
+            dict(var, name_part='first') for var in scores_detail['first_name']['metrics']['variations']
+        ]
+        if scores_detail.get('last_name', {}):
+            last_name_variations = scores_detail.get('last_name', {}).get('metrics', {}).get('variations', [])
+            variation_rows.extend(dict(var, name_part='last') for var in last_name_variations)
+        names.append({
+            'name': name,
+            'final_score': scores_detail['final_score'],
+            'base_score': scores_detail['base_score'],
+            'content_hash': content_hashes.get(name),
+            'variations': variation_rows,
+        })
+    return {'uid': uid, 'avg_final_score': variations_scores['average_final_score'], 'names': names}
+
+
+def add_score_session(record: Dict, storage: str = 'rows') -> ScoreSession:
+    """
+    Add a session_record() to db.session without committing.
+
+    Creates the UserUID on first sight of the uid. storage is the
+    VARIATION_STORAGE mode: 'rows' adds one VariationScore per variation,
+    'packed' one blob per NameScore.
+    """
+    user = UserUID.query.filter_by(uid=record['uid']).first()
+    if not user:
+        user = UserUID(uid=record['uid'])
+        db.session.add(user)
+        db.session.flush()
+        print(f"Created new UserUID for uid: {record['uid']}")
+    session = ScoreSession(user_id=user.id, avg_final_score=record['avg_final_score'])
+    for entry in record['names']:
+        name_score = NameScore(
+            name=entry['name'],
+            final_score=entry['final_score'],
+            base_score=entry['base_score'],
+            content_hash=entry['content_hash']
+        )
+        if storage == 'packed':
+            # One blob per name instead of one row per variation
+            name_score.packed_variations = pack_variations(entry['variations'])
+        else:
+            name_score.variations = [
+                VariationScore(
+                    variation=var['variation'],
+                    phonetic_score=var['phonetic_score'],
+                    orthographic_score=var['orthographic_score'],
+                    name_part=var['name_part']
+                ) for var in entry['variations']
+            ]
+        session.names.append(name_score)
+    db.session.add(session)
+    return session
+
+
+class WriteBehindBuffer:
+    """
+    Group commit for score sessions.
+
+    Requests submit() session records; a background thread collects them for up
+    to interval_ms (or until max_batch are queued) and writes the whole batch in
+    one transaction, so N concurrent submissions cost one SQLite commit and
+    fsync instead of N. If the batch commit fails, each record is retried in its
+    own transaction so one bad session cannot fail the others. Each record's
+    Future resolves once its transaction commits (or fails); a record whose
+    Future was cancelled before its batch started is not written.
+    """
+
+    def __init__(self, app, interval_ms: float, max_batch: int):
+        self.app = app
+        self.interval = interval_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.storage = app.config['VARIATION_STORAGE']
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='score-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, record: Dict) -> Future:
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def close(self):
+        """Flush whatever is queued and stop the flusher thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _next_batch(self) -> Optional[List]:
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        batch_deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            remaining = batch_deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            with self.app.app_context():
+                g.job_name = 'write_behind'  # Attributes the flush's queries in the slow-query log
+                self._flush(batch)
+
+    def _flush(self, batch: List):
+        # Claim each record; after this a waiting request can no longer withdraw it
+        batch = [(record, future) for record, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        WRITE_BEHIND_BATCH.observe(len(batch))
+        try:
+            for record, _ in batch:
+                add_score_session(record, self.storage)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Group commit of {len(batch)} score sessions failed, retrying one by one: {str(e)}")
+        else:
+            for _, future in batch:
+                future.set_result(True)
+            return
+        for record, future in batch:
+            try:
+                add_score_session(record, self.storage)
+                db.session.commit()
+                future.set_result(True)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Saving score session for uid {record['uid']} failed: {str(e)}")
+                future.set_exception(e)
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def get_write_behind(app) -> Optional[WriteBehindBuffer]:
+    """The app's write-behind buffer for this process, or None when WRITE_BEHIND is 'off'"""
+    if app.config['WRITE_BEHIND'] == 'off':
+        return None
+    # Keyed by pid too: a forked worker must start its own flusher thread
+    key = (id(app), os.getpid())
+    buffer = _buffers.get(key)
+    if buffer is None:
+        with _buffers_lock:
+            buffer = _buffers.get(key)
+            if buffer is None:
+                buffer = _buffers[key] = WriteBehindBuffer(
+                    app, app.config['WRITE_BEHIND_INTERVAL_MS'], app.config['WRITE_BEHIND_MAX_BATCH']
+                )
+    return buffer
+
+
+def save_score_session(app, record: Dict, deadline: Deadline = None):
+    """
+    Persist a session_record() according to app.config['WRITE_BEHIND'].
+
+    'off' adds and commits it on the request's db.session; 'relaxed' returns as
+    soon as it is queued, so a crash may lose it. 'durable' waits for its group
+    commit and re-raises a failure. If the deadline (the request's time budget)
+    runs out first, the queued session is withdrawn and SessionNotPersisted is
+    raised, so a retry cannot end up saving it twice. A session whose batch
+    has already started cannot be withdrawn; its commit is waited for.
+    """
+    buffer = get_write_behind(app)
+    if buffer is None:
+        add_score_session(record, app.config['VARIATION_STORAGE'])
+        db.session.commit()
+        return
+    # End the request's own transaction so it cannot hold a lock the group commit needs
+    db.session.rollback()
+    future = buffer.submit(record)
+    if app.config['WRITE_BEHIND'] != 'durable':
+        return
+    try:
+        future.result(timeout=deadline.remaining() if deadline is not None else None)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise SessionNotPersisted("Score session was not saved before the request timed out")
+        future.result()
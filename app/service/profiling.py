@@ -0,0 +1,175 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, List, Optional
+from flask import make_response, request
+
+# At most one profiled request per interval per process; others run normally
+PROFILE_MIN_INTERVAL_SECONDS = float(os.getenv('YANEZ_PROFILE_MIN_INTERVAL_SECONDS', 10))
+# Number of reports kept in memory per process
+PROFILE_HISTORY_SIZE = int(os.getenv('YANEZ_PROFILE_HISTORY_SIZE', 50))
+PROFILE_TOP_FUNCTIONS = 30
+
+# Modules whose time is broken out in every report
+PROFILED_MODULES = {
+    'reward': os.path.join('app', 'utils', 'reward.py'),
+    'rule_evaluator': os.path.join('app', 'utils', 'rule_evaluator.py'),
+    'var_modifier': os.path.join('app', 'utils', 'var_modifier.py'),
+    'cal_score': os.path.join('app', 'service', 'cal_score.py'),
+}
+
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+_profiler_lock = threading.Lock()
+_last_profile_at = 0.0
+
+
+def profiling_requested() -> bool:
+    """True when the request opts in with an X-Profile header or profile=1 query flag"""
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    return bool(flag) and flag.lower() in ('1', 'true', 'yes')
+
+
+def _try_start() -> bool:
+    """Take the profiler if it is free and the rate limit allows; never blocks"""
+    global _last_profile_at
+    if not _profiler_lock.acquire(blocking=False):
+        return False
+    now = time.monotonic()
+    if _last_profile_at and now - _last_profile_at < PROFILE_MIN_INTERVAL_SECONDS:
+        _profiler_lock.release()
+        return False
+    _last_profile_at = now
+    return True
+
+
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name  # Built-in
+    return f"{os.path.relpath(filename) if os.path.isabs(filename) else filename}:{line}({name})"
+
+
+def _module_of(filename: str) -> Optional[str]:
+    for module, path in PROFILED_MODULES.items():
+        if filename.endswith(path):
+            return module
+    return None
+
+
+def summarize_profile(stats: pstats.Stats, top: int = PROFILE_TOP_FUNCTIONS) -> Dict:
+    """
+    Reduce raw profiler stats to the top functions and per-module time.
+
+    Args:
+        stats: Stats of a finished profile
+        top: Number of functions to keep, by cumulative time
+
+    Returns:
+        Dictionary with 'top_functions' and 'modules'. A module's self_ms is the
+        time spent in its own code; cumulative_ms is the inclusive time of calls
+        entering it from other modules.
+    """
+    functions = []
+    modules = {module: {'self_ms': 0.0, 'cumulative_ms': 0.0, 'calls': 0} for module in PROFILED_MODULES}
+    for func, (primitive_calls, calls, self_time, cumulative, callers) in stats.stats.items():
+        functions.append({
+            'function': _function_label(func),
+            'calls': calls,
+            'self_ms': round(self_time * 1000.0, 3),
+            'cumulative_ms': round(cumulative * 1000.0, 3),
+        })
+        module = _module_of(func[0])
+        if module is None:
+            continue
+        modules[module]['self_ms'] += self_time * 1000.0
+        modules[module]['calls'] += calls
+        for caller, edge in callers.items():
+            if _module_of(caller[0]) != module:
+                modules[module]['cumulative_ms'] += edge[3] * 1000.0
+
+    functions.sort(key=lambda f: f['cumulative_ms'], reverse=True)
+    for totals in modules.values():
+        totals['self_ms'] = round(totals['self_ms'], 3)
+        totals['cumulative_ms'] = round(totals['cumulative_ms'], 3)
+    return {'top_functions': functions[:top], 'modules': modules}
+
+
+def _store_report(report: Dict):
+    with _reports_lock:
+        _reports[report['id']] = report
+        while len(_reports) > PROFILE_HISTORY_SIZE:
+            _reports.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    with _reports_lock:
+        return _reports.get(profile_id)
+
+
+def list_profiles() -> List[Dict]:
+    """Summaries of the stored reports, newest first"""
+    with _reports_lock:
+        reports = list(_reports.values())
+    return [
+        {key: report[key] for key in ('id', 'endpoint', 'created_at', 'wall_ms', 'status_code')}
+        for report in reversed(reports)
+    ]
+
+
+def profiled(f):
+    """
+    Run the view under cProfile when the request asks for it.
+
+    Apply below require_api_key so only authenticated callers can profile. The
+    report is kept in memory and its id returned in the X-Profile-Id header;
+    fetch it from GET /api/yanez/profile/<id>. Requests over the rate limit, or
+    arriving while another request is being profiled, run unprofiled with
+    X-Profile-Skipped set.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not profiling_requested():
+            return f(*args, **kwargs)
+        if not _try_start():
+            response = make_response(f(*args, **kwargs))
+            response.headers['X-Profile-Skipped'] = 'rate-limited'
+            return response
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a developer's) already owns this thread
+                response = make_response(f(*args, **kwargs))
+                response.headers['X-Profile-Skipped'] = 'profiler-busy'
+                return response
+            start = time.perf_counter()
+            try:
+                result = f(*args, **kwargs)
+            finally:
+                profiler.disable()
+            wall_ms = (time.perf_counter() - start) * 1000.0
+        finally:
+            _profiler_lock.release()
+
+        response = make_response(result)
+        report = {
+            'id': uuid.uuid4().hex[:16],
+            'endpoint': request.endpoint,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'wall_ms': round(wall_ms, 3),
+            'status_code': response.status_code,
+            'request_bytes': request.content_length,
+            **summarize_profile(pstats.Stats(profiler)),
+        }
+        _store_report(report)
+        response.headers['X-Profile-Id'] = report['id']
+        return response
+    return decorated
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.metrics import CACHE_LOOKUPS, REGISTRY
+from app.utils.pair_cache import SCORING_VERSION
+
+# Per-name scoring results kept in memory per process; 0 disables the store
+RESULT_STORE_SIZE = int(os.getenv('YANEZ_RESULT_STORE_SIZE', 4096))
+
+
+def result_key(config_fingerprint: str, name: str, variations: List[str]) -> str:
+    """
+    Content hash of one name's scoring input.
+
+    Variations are hashed in submission order: the uniqueness check keeps the
+    first of any near-duplicate pair, so reordering can change the score.
+    """
+    payload = json.dumps([SCORING_VERSION, config_fingerprint, name, variations], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class ResultStore:
+    """
+    Bounded LRU of (final_score, metrics) per scored name, keyed by result_key().
+
+    Identical submissions (retries, or the same payload sent by several miners)
+    reuse the stored metrics instead of rescoring. Stored metrics are shared
+    between requests, so treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = RESULT_STORE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        CACHE_LOOKUPS.inc(cache='score_result', result='hit' if result is not None else 'miss')
+        return result
+
+    def put(self, key: str, final_score: float, metrics: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (final_score, metrics)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+RESULT_STORE = ResultStore()
+
+REGISTRY.register_callback(
+    'yanez_result_store_entries', 'Scored names held in the in-process result store', 'gauge',
+    (), 'score_result', lambda: {(): len(RESULT_STORE)}
+)
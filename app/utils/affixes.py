@@ -0,0 +1,52 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 YANEZ - MIID Team
+
+from typing import Optional
+
+# Honorific titles and generational/professional suffixes shared by rule
+# detection (rule_evaluator) and generation (rule_applier). List order is kept
+# as-is because generators pick from these with random.choice.
+TITLES = ["Mr.", "Mrs.", "Ms.", "Mr", "Mrs", "Ms", "Miss", "Dr.", "Dr",
+          "Prof.", "Prof", "Sir", "Lady", "Lord", "Dame", "Master", "Mistress",
+          "Rev.", "Hon.", "Capt.", "Col.", "Lt.", "Sgt.", "Maj."]
+SUFFIXES = ["Jr.", "Sr.", "III", "IV", "V", "PhD", "MD", "Esq.", "Jr", "Sr"]
+
+# No affix contains a space, so "name starts with '<title> '" is the same test as
+# "the first space-delimited token is a title" - one set lookup instead of a scan
+TITLE_SET = frozenset(TITLES)
+SUFFIX_SET = frozenset(SUFFIXES)
+
+
+def split_leading_title(name: str) -> Optional[str]:
+    """
+    Find the title a name starts with.
+
+    Args:
+        name: Full name, e.g. "Dr. John Smith"
+
+    Returns:
+        The remainder after "<title> " (e.g. "John Smith"), or None if the name
+        does not start with a known title followed by a space
+    """
+    title, sep, rest = name.partition(' ')
+    if sep and title in TITLE_SET:
+        return rest
+    return None
+
+
+def split_trailing_suffix(name: str) -> Optional[str]:
+    """
+    Find the suffix a name ends with.
+
+    Args:
+        name: Full name, e.g. "John Smith Jr."
+
+    Returns:
+        The name before " <suffix>" (e.g. "John Smith"), or None if the name
+        does not end with a space followed by a known suffix
+    """
+    rest, sep, suffix = name.rpartition(' ')
+    if sep and suffix in SUFFIX_SET:
+        return rest
+    return None
@@ -0,0 +1,57 @@
+import gzip
+import os
+import zlib
+from flask import request
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv('YANEZ_COMPRESS_MIN_SIZE', 1024))
+# 1 (fastest) to 9 (smallest); mid levels give most of the size win for JSON
+COMPRESS_LEVEL = int(os.getenv('YANEZ_COMPRESS_LEVEL', 5))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def compress_body(data: bytes, encoding: str, level: int = COMPRESS_LEVEL) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    # HTTP "deflate" is the zlib-wrapped format, not raw deflate
+    return zlib.compress(data, level)
+
+
+def init_app(app):
+    """
+    Compress responses with gzip or deflate when the client's Accept-Encoding allows it.
+
+    Streamed/file responses, already-encoded bodies, small bodies (below
+    COMPRESS_MIN_SIZE or app.config['COMPRESS_MIN_SIZE']) and non-text types are
+    left alone. Set app.config['COMPRESS_ENABLED'] = False to turn it off.
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    min_size = app.config.get('COMPRESS_MIN_SIZE', COMPRESS_MIN_SIZE)
+    level = app.config.get('COMPRESS_LEVEL', COMPRESS_LEVEL)
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300
+        ):
+            return response
+        encoding = request.accept_encodings.best_match(('gzip', 'deflate'))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        compressed = compress_body(data, encoding, level)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(compressed))
+        return response
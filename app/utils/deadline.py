@@ -0,0 +1,33 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised by Deadline.check() once a request's scoring time budget is spent"""
+
+
+class Deadline:
+    """
+    Point in time (time.monotonic) by which a request's scoring must stop.
+
+    A Deadline created with seconds=None never expires, so callers can pass one
+    unconditionally.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a limit"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded(f"Scoring deadline of {self.seconds:.1f}s exceeded")
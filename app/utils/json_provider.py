@@ -0,0 +1,94 @@
+import json
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+# 'auto' uses orjson when installed, 'stdlib' forces the json module
+JSON_BACKEND = os.getenv('YANEZ_JSON_BACKEND', 'auto')
+# Round floats in responses to this many decimal places; unset keeps full precision
+JSON_FLOAT_PRECISION = os.getenv('YANEZ_JSON_FLOAT_PRECISION')
+
+
+def round_floats(obj, precision: int):
+    """Copy of obj with every float rounded to precision decimal places"""
+    if isinstance(obj, float):
+        return round(obj, precision)
+    if isinstance(obj, dict):
+        return {key: round_floats(value, precision) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(value, precision) for value in obj]
+    return obj
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when it is available.
+
+    Output matches DefaultJSONProvider (sorted keys, compact unless debug) except
+    that non-ASCII text is emitted as UTF-8 rather than \\u escapes. Set
+    float_precision to round floats in responses; keyword arguments orjson does
+    not understand fall back to the stdlib encoder.
+    """
+
+    def __init__(self, app, backend: str = JSON_BACKEND, float_precision: int = None):
+        super().__init__(app)
+        if backend not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError(f"Unknown JSON backend '{backend}', expected auto, orjson or stdlib")
+        if backend == 'orjson' and orjson is None:
+            raise ValueError("JSON backend 'orjson' requested but orjson is not installed")
+        self.use_orjson = orjson is not None and backend != 'stdlib'
+        self.float_precision = float_precision
+
+    def _orjson_default(self, obj):
+        # NumPy scalars (e.g. np.mean results) and anything Flask knows how to encode
+        if hasattr(obj, 'item') and callable(obj.item):
+            return obj.item()
+        return self.default(obj)
+
+    def _encode(self, obj, indent: bool = False) -> bytes:
+        if self.float_precision is not None:
+            obj = round_floats(obj, self.float_precision)
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self._orjson_default, option=option)
+        kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+        return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs or not self.use_orjson:
+            if self.float_precision is not None:
+                obj = round_floats(obj, self.float_precision)
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or not self.use_orjson:
+            return json.loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # The stdlib parser also accepts NaN/Infinity and integers beyond 64 bits
+            return json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._encode(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Install FastJSONProvider using app.config JSON_BACKEND / JSON_FLOAT_PRECISION (env defaults)"""
+    precision = app.config.get('JSON_FLOAT_PRECISION', JSON_FLOAT_PRECISION)
+    app.json = FastJSONProvider(
+        app,
+        backend=app.config.get('JSON_BACKEND', JSON_BACKEND),
+        float_precision=int(precision) if precision not in (None, '') else None,
+    )
@@ -0,0 +1,124 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Tuple
+
+# Bytes read from the stream per refill
+STREAM_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+# Characters that may follow a complete value
+_VALUE_END = _WHITESPACE + ',:]}'
+_DECODER = json.JSONDecoder()
+
+
+class _StreamReader:
+    """UTF-8 text buffer over a binary stream, refilled on demand; consumed text is dropped on refill"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = None) -> bool:
+        """Append up to size more bytes (chunk_size by default); False once the stream is exhausted"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + self.decoder.decode(chunk or b'', final=not chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else 'end of body'
+            raise ValueError(f"Invalid JSON body: expected {' or '.join(repr(c) for c in chars)}, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Usually a value cut off by the end of the buffer. Doubling the
+                # read keeps re-decoding a large value linear in its size.
+                if self.fill(size):
+                    size *= 2
+                    continue
+                raise ValueError(f"Invalid JSON body: {e.msg}")
+            # A number cut by the buffer end may continue in the next chunk ("12" of "12.5")
+            if (end == len(self.buf) or self.buf[end] not in _VALUE_END) and self.fill(size):
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+
+def _members(reader: _StreamReader) -> Iterator[str]:
+    """
+    Keys of an object whose '{' was just consumed, consuming its closing '}'.
+
+    The caller must consume each key's value before asking for the next key.
+    """
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        if reader.peek() != '"':
+            raise ValueError("Invalid JSON body: expected an object key")
+        key = reader.value()
+        reader.expect(':')
+        yield key
+        if reader.expect(',}') == '}':
+            return
+
+
+def iter_object_items(stream: BinaryIO, expand: Iterable[str] = (),
+                      chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[Optional[str], str, Any]]:
+    """
+    Parse a JSON object from a binary stream, yielding its members as they arrive.
+
+    Args:
+        stream: File-like object with read(size), e.g. the WSGI request stream
+        expand: Top-level keys whose object values are yielded entry by entry
+            instead of being built whole
+        chunk_size: Bytes read per refill
+
+    Returns:
+        Iterator of (None, key, value) for top-level members and (parent, key, value)
+        for the entries of an expanded member, in document order. Only the value
+        being yielded and one buffer of unparsed text are held in memory.
+
+    Raises:
+        ValueError: If the body is not a single well-formed JSON object
+    """
+    expand = frozenset(expand)
+    reader = _StreamReader(stream, chunk_size)
+    reader.expect('{')
+    for key in _members(reader):
+        if key in expand and reader.peek() == '{':
+            reader.expect('{')
+            for entry_key in _members(reader):
+                yield key, entry_key, reader.value()
+        else:
+            yield None, key, reader.value()
+    if reader.peek():
+        raise ValueError("Invalid JSON body: unexpected data after the top-level object")
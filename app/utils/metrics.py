@@ -0,0 +1,261 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# Seconds; spans a cached GET up to a worst-case scoring request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with-block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read at scrape time, e.g. from lru_cache.cache_info()"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, labelnames: Tuple[str, ...],
+                 callback: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def expose(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+class Registry:
+    """Process-local collection of metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def register_callback(self, name: str, documentation: str, metric_type: str, labelnames: Tuple[str, ...],
+                          key: str, callback: Callable[[], Dict[Tuple, float]]):
+        """
+        Add a scrape-time source to a callback metric. Several modules may feed the
+        same metric under different keys; re-registering a key replaces it.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                sources = self._callbacks[name] = {}
+                metric = self._metrics[name] = CallbackMetric(
+                    name, documentation, metric_type, labelnames,
+                    lambda: {k: v for source in list(sources.values()) for k, v in source().items()}
+                )
+            self._callbacks[name][key] = callback
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'yanez_http_request_duration_seconds', 'HTTP request latency by route', ('endpoint', 'method', 'status')
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    'yanez_db_queries_per_request', 'SQL statements executed per HTTP request', ('endpoint',), QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = REGISTRY.histogram(
+    'yanez_db_query_duration_per_request_seconds', 'Time spent in SQL statements per HTTP request', ('endpoint',)
+)
+DB_QUERIES = REGISTRY.counter('yanez_db_queries_total', 'SQL statements executed', ('context',))
+SCORING_STAGE = REGISTRY.histogram(
+    'yanez_scoring_stage_duration_seconds',
+    'Time spent per scoring stage (rule_compliance, part_score, uniqueness within part_score, persistence)',
+    ('stage',)
+)
+VARIATIONS_SCORED = REGISTRY.counter('yanez_variations_scored_total', 'Variations submitted for scoring')
+UNSCORED_NAMES = REGISTRY.counter('yanez_unscored_names_total', 'Names left unscored because the scoring deadline expired')
+CACHE_LOOKUPS = REGISTRY.counter('yanez_cache_lookups_total', 'Cache lookups by cache and result', ('cache', 'result'))
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    'yanez_admission_rejections_total', 'Scoring requests refused by admission control', ('endpoint', 'reason')
+)
+WRITE_BEHIND_BATCH = REGISTRY.histogram(
+    'yanez_write_behind_batch_size', 'Score sessions written per group commit', (),
+    (1, 2, 4, 8, 16, 32, 64, 128)
+)
+SCHEDULER_JOB = REGISTRY.histogram(
+    'yanez_scheduler_job_duration_seconds', 'Scheduled job run time', ('job', 'status'),
+    (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+
+def lru_cache_source(cache_name: str, func) -> Callable[[], Dict[Tuple, float]]:
+    """Callback reporting an lru_cache-wrapped function's hit/miss totals as cache lookups"""
+    def source():
+        info = func.cache_info()
+        return {(cache_name, 'hit'): info.hits, (cache_name, 'miss'): info.misses}
+    return source
+
+
+def register_lru_cache(cache_name: str, func):
+    """Expose an lru_cache's hit/miss counts under yanez_lru_cache_lookups_total"""
+    REGISTRY.register_callback(
+        'yanez_lru_cache_lookups_total', 'In-process lru_cache lookups by cache and result', 'counter',
+        ('cache', 'result'), cache_name, lru_cache_source(cache_name, func)
+    )
+
+
+def init_app(app):
+    """
+    Record per-route request latency and per-request SQL statement count/time.
+
+    Metrics are kept per process; under gunicorn each scrape reports the worker
+    that served it.
+    """
+    from flask import g, has_request_context, request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not getattr(Engine, '_yanez_metrics_installed', False):
+        Engine._yanez_metrics_installed = True
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['query_start'].pop()
+            if has_request_context():
+                g.metrics_queries = g.get('metrics_queries', 0) + 1
+                g.metrics_query_time = g.get('metrics_query_time', 0.0) + elapsed
+                DB_QUERIES.inc(context='request')
+            else:
+                DB_QUERIES.inc(context='background')
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start, endpoint=endpoint, method=request.method, status=response.status_code
+            )
+            DB_QUERIES_PER_REQUEST.observe(g.get('metrics_queries', 0), endpoint=endpoint)
+            DB_TIME_PER_REQUEST.observe(g.get('metrics_query_time', 0.0), endpoint=endpoint)
+        return response
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.utils.metrics import CACHE_LOOKUPS
+
+# Bump when a change to the scoring or rule code makes previously cached results stale
+SCORING_VERSION = os.getenv('YANEZ_SCORING_VERSION', '1')
+
+# Cache is disabled unless a path is configured
+PAIR_CACHE_PATH = os.getenv('YANEZ_PAIR_CACHE_PATH')
+PAIR_CACHE_MAX_ENTRIES = int(os.getenv('YANEZ_PAIR_CACHE_MAX_ENTRIES', 1_000_000))
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on old SQLite builds
+_BATCH_SIZE = 500
+
+
+def pair_key(seed: str, variation: str, kind: str) -> bytes:
+    """Stable hash of (scoring version, kind, seed, variation); unlike hash() it survives restarts"""
+    payload = json.dumps([SCORING_VERSION, kind, seed, variation], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class PairCache:
+    """
+    Persistent cache of per-(seed, variation) similarity scores and rule bitmasks.
+
+    Backed by a single SQLite table shared by every worker on the host. Entries
+    carry a last-used timestamp and the table is trimmed back below
+    max_entries, oldest first, every evict_every writes. Any SQLite error is
+    logged and treated as a miss, so the cache can never fail a scoring request.
+    """
+
+    def __init__(self, path: str, max_entries: int = PAIR_CACHE_MAX_ENTRIES, evict_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pair_cache ("
+            " key BLOB PRIMARY KEY,"
+            " phonetic REAL,"
+            " orthographic REAL,"
+            " rules_evaluated INTEGER,"
+            " rules_satisfied INTEGER,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pair_cache_last_used ON pair_cache (last_used)")
+
+    def _fetch(self, keys: List[bytes], columns: str) -> Dict[bytes, tuple]:
+        rows = {}
+        now = int(time.time())
+        with self._lock:
+            for i in range(0, len(keys), _BATCH_SIZE):
+                batch = keys[i:i + _BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                hits = []
+                for row in self._conn.execute(
+                    f"SELECT key, {columns} FROM pair_cache WHERE key IN ({placeholders})", batch
+                ):
+                    if row[1] is not None:
+                        rows[row[0]] = row[1:]
+                        hits.append(row[0])
+                # Touch only the rows this batch actually read; an all-miss batch writes nothing
+                if hits:
+                    self._conn.execute(
+                        f"UPDATE pair_cache SET last_used = ? WHERE key IN ({','.join('?' * len(hits))})",
+                        [now, *hits]
+                    )
+        return rows
+
+    def _store(self, rows: List[tuple], columns: Tuple[str, str]):
+        if not rows:
+            return
+        now = int(time.time())
+        first, second = columns
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT INTO pair_cache (key, {first}, {second}, last_used) VALUES (?, ?, ?, ?) "
+                    f"ON CONFLICT(key) DO UPDATE SET {first} = excluded.{first}, "
+                    f"{second} = excluded.{second}, last_used = excluded.last_used",
+                    [(*row, now) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes_since_evict += len(rows)
+            if self._writes_since_evict >= self.evict_every:
+                self._writes_since_evict = 0
+                self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM pair_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Trim 10% below the bound so eviction does not run on every write batch
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM pair_cache WHERE key IN "
+            "(SELECT key FROM pair_cache ORDER BY last_used ASC LIMIT ?)", (excess,)
+        )
+
+    def _count(self, hits: int, misses: int, cache: str):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        CACHE_LOOKUPS.inc(hits, cache=cache, result='hit')
+        CACHE_LOOKUPS.inc(misses, cache=cache, result='miss')
+
+    def get_similarities(self, seed: str, variations: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+        """Cached (phonetic, orthographic) scores for the variations of a seed, keyed by variation"""
+        keys = {pair_key(seed, variation, 'similarity'): variation for variation in variations}
+        try:
+            rows = self._fetch(list(keys), "phonetic, orthographic")
+        except sqlite3.Error as e:
+            print(f"Pair cache lookup failed: {str(e)}")
+            rows = {}
+        self._count(len(rows), len(keys) - len(rows), 'pair_similarity')
+        return {keys[key]: (row[0], row[1]) for key, row in rows.items()}
+
+    def put_similarities(self, seed: str, scores: Dict[str, Tuple[float, float]]):
+        """Store (phonetic, orthographic) scores for the variations of a seed"""
+        rows = [(pair_key(seed, variation, 'similarity'), p, o) for variation, (p, o) in scores.items()]
+        try:
+            self._store(rows, ("phonetic", "orthographic"))
+        except sqlite3.Error as e:
+            print(f"Pair cache write failed: {str(e)}")
+
+    def get_rule_masks(self, seed: str, variations: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """Cached (evaluated, satisfied) rule bitmasks for the variations of a seed, keyed by variation"""
+        keys = {pair_key(seed, variation, 'rules'): variation for variation in variations}
+        try:
+            rows = self._fetch(list(keys), "rules_evaluated, rules_satisfied")
+        except sqlite3.Error as e:
+            print(f"Pair cache lookup failed: {str(e)}")
+            rows = {}
+        self._count(len(rows), len(keys) - len(rows), 'pair_rules')
+        return {keys[key]: (row[0], row[1]) for key, row in rows.items()}
+
+    def put_rule_masks(self, seed: str, masks: Dict[str, Tuple[int, int]]):
+        """Store (evaluated, satisfied) rule bitmasks for the variations of a seed"""
+        rows = [(pair_key(seed, variation, 'rules'), e, s) for variation, (e, s) in masks.items()]
+        try:
+            self._store(rows, ("rules_evaluated", "rules_satisfied"))
+        except sqlite3.Error as e:
+            print(f"Pair cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0
+        }
+
+
+_pair_cache = None
+_pair_cache_failed = False
+_pair_cache_lock = threading.Lock()
+
+def get_pair_cache() -> Optional[PairCache]:
+    """Return the process-wide pair cache, or None when YANEZ_PAIR_CACHE_PATH is not set"""
+    global _pair_cache, _pair_cache_failed
+    if _pair_cache is None and PAIR_CACHE_PATH and not _pair_cache_failed:
+        with _pair_cache_lock:
+            if _pair_cache is None and not _pair_cache_failed:
+                try:
+                    _pair_cache = PairCache(PAIR_CACHE_PATH)
+                except sqlite3.Error as e:
+                    print(f"Pair cache disabled, could not open {PAIR_CACHE_PATH}: {str(e)}")
+                    _pair_cache_failed = True
+    return _pair_cache
@@ -0,0 +1,130 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Statements slower than this are recorded; a negative value disables the log
+SLOW_QUERY_MS = float(os.getenv('YANEZ_SLOW_QUERY_MS', 100))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('YANEZ_SLOW_QUERY_LOG_SIZE', 200))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_slow_queries_lock = threading.Lock()
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and replace literals and IN-lists with placeholders so similar queries group together"""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return _IN_LIST.sub('(...)', statement)
+
+
+def parameters_shape(parameters, executemany: bool):
+    """Types (never values) of the bound parameters; for executemany, the row count and first row"""
+    if executemany:
+        rows = list(parameters or [])
+        return {'rows': len(rows), 'row': parameters_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def explain_query_plan(dbapi_connection, statement: str, parameters) -> Optional[List[str]]:
+    """SQLite EXPLAIN QUERY PLAN details for a SELECT; None for other statements or on error"""
+    if not statement.lstrip().upper().startswith('SELECT'):
+        return None
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())
+        # Rows are (id, parent, notused, detail)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _caller() -> str:
+    from flask import g, has_app_context, has_request_context, request
+    if has_request_context():
+        return request.endpoint or request.path
+    if has_app_context() and g.get('job_name'):
+        return f"job:{g.job_name}"
+    return 'background'
+
+
+def record_slow_query(entry: Dict):
+    with _slow_queries_lock:
+        _slow_queries.append(entry)
+
+
+def get_slow_queries(limit: int = None) -> List[Dict]:
+    """Recorded slow queries, newest first"""
+    with _slow_queries_lock:
+        entries = list(_slow_queries)
+    entries.reverse()
+    return entries[:limit] if limit else entries
+
+
+def clear_slow_queries():
+    with _slow_queries_lock:
+        _slow_queries.clear()
+
+
+def init_app(app):
+    """
+    Log statements on the app's db engine that exceed SLOW_QUERY_MS
+    (app.config['SLOW_QUERY_MS'] overrides the YANEZ_SLOW_QUERY_MS env var).
+
+    Each entry holds the normalized statement, parameter types, the calling
+    route (or scheduler job) and, for SQLite SELECTs, EXPLAIN QUERY PLAN output
+    with full table scans flagged.
+    """
+    from sqlalchemy import event
+    from app.model.score import db
+
+    threshold_ms = app.config.get('SLOW_QUERY_MS', SLOW_QUERY_MS)
+    if threshold_ms is None or threshold_ms < 0:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if getattr(engine, '_yanez_slow_query_log', False):
+        return
+    engine._yanez_slow_query_log = True
+    is_sqlite = engine.dialect.name == 'sqlite'
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['slow_query_start'].pop()) * 1000.0
+        if elapsed_ms < threshold_ms:
+            return
+        plan = None
+        if is_sqlite and not executemany:
+            plan = explain_query_plan(conn.connection.dbapi_connection, statement, parameters)
+        entry = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(elapsed_ms, 3),
+            'statement': normalize_statement(statement),
+            'parameters': parameters_shape(parameters, executemany),
+            'route': _caller(),
+            'plan': plan,
+            # SQLite reports table scans that use no index as "SCAN <table>"
+            'full_scan': bool(plan) and any(d.startswith('SCAN') and 'INDEX' not in d for d in plan),
+        }
+        record_slow_query(entry)
+        print(f"Slow query ({entry['duration_ms']:.1f} ms) in {entry['route']}: {entry['statement']}")
@@ -17,7 +17,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 import numpy as np
-from typing import List, Dict, Tuple, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Tuple, Any, Optional
 import Levenshtein
 import jellyfish
 import os
@@ -28,7 +30,10 @@ import math
 import random
 
 # Import rule_evaluator for rule-based compliance checking
-from app.utils.rule_evaluator import evaluate_rule_compliance
+from app.utils.rule_evaluator import classify_variations, RULE_BITS
+from app.utils.deadline import Deadline
+from app.utils.pair_cache import get_pair_cache
+from app.utils.metrics import SCORING_STAGE, register_lru_cache
 
 # Define the reward component weights globally
 MIID_REWARD_WEIGHTS = {
@@ -59,33 +64,50 @@ def reward(query: int, response: int) -> float:
     return 1.0 if response == query * 2 else 0
 
 
-def calculate_phonetic_similarity(original_name: str, variation: str) -> float:
-    """
-    Calculate phonetic similarity between two strings using a randomized subset of phonetic algorithms.
-    This makes it harder for miners to game the system by not knowing which algorithms will be used.
-    The selection and weighting are deterministic for each original_name.
+# Available phonetic algorithms, each mapping a string to its phonetic code
+PHONETIC_ALGORITHMS = {
+    "soundex": jellyfish.soundex,
+    "metaphone": jellyfish.metaphone,
+    "nysiis": jellyfish.nysiis,
+    # Add more algorithms if needed
+}
+
+# Upper bound on the cached phonetic profiles and seed contexts
+PHONETIC_PROFILE_CACHE_SIZE = 65536
+SEED_CONTEXT_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=PHONETIC_PROFILE_CACHE_SIZE)
+def get_phonetic_profile(original_name: str) -> Tuple[Tuple[str, float, str], ...]:
     """
-    # Define available phonetic algorithms
-    algorithms = {
-        "soundex": lambda x, y: jellyfish.soundex(x) == jellyfish.soundex(y),
-        "metaphone": lambda x, y: jellyfish.metaphone(x) == jellyfish.metaphone(y),
-        "nysiis": lambda x, y: jellyfish.nysiis(x) == jellyfish.nysiis(y),
-        # Add more algorithms if needed
-    }
+    Return the (algorithm, weight, phonetic code of original_name) triples used to score variations of a name.
 
+    The selection and weighting are deterministic for each original_name and use a
+    private RNG, so the global random state is left untouched.
+    """
     # Deterministically seed the random selection based on the original name
-    random.seed(hash(original_name) % 10000)
-    selected_algorithms = random.sample(list(algorithms.keys()), k=min(3, len(algorithms)))
+    rng = random.Random(hash(original_name) % 10000)
+    selected_algorithms = rng.sample(list(PHONETIC_ALGORITHMS.keys()), k=min(3, len(PHONETIC_ALGORITHMS)))
 
     # Generate random weights that sum to 1.0
-    weights = [random.random() for _ in selected_algorithms]
+    weights = [rng.random() for _ in selected_algorithms]
     total_weight = sum(weights)
     normalized_weights = [w / total_weight for w in weights]
 
+    return tuple(
+        (algo, weight, PHONETIC_ALGORITHMS[algo](original_name))
+        for algo, weight in zip(selected_algorithms, normalized_weights)
+    )
+
+def calculate_phonetic_similarity(original_name: str, variation: str) -> float:
+    """
+    Calculate phonetic similarity between two strings using a randomized subset of phonetic algorithms.
+    This makes it harder for miners to game the system by not knowing which algorithms will be used.
+    The selection and weighting are deterministic for each original_name.
+    """
     # Calculate the weighted phonetic score
     phonetic_score = sum(
-        algorithms[algo](original_name, variation) * weight
-        for algo, weight in zip(selected_algorithms, normalized_weights)
+        (PHONETIC_ALGORITHMS[algo](variation) == code) * weight
+        for algo, weight, code in get_phonetic_profile(original_name)
     )
 
     return float(phonetic_score)
@@ -112,14 +134,162 @@ def calculate_orthographic_similarity(original_name: str, variation: str) -> flo
         print(f"Error calculating orthographic score: {str(e)}")
         return 0.0
 
+def orthographic_similarity_at_least(original_name: str, variation: str, min_similarity: float) -> Optional[float]:
+    """
+    Threshold-aware orthographic similarity for band and cutoff checks.
+
+    The edit distance is bounded by the largest distance min_similarity allows,
+    so Levenshtein stops as soon as the pair is known to fall below it.
+
+    Args:
+        original_name: The original name
+        variation: The variation to compare against
+        min_similarity: Lowest similarity the caller is interested in
+
+    Returns:
+        The exact calculate_orthographic_similarity() score when it may reach
+        min_similarity (callers still compare it themselves), otherwise None
+    """
+    max_len = max(len(original_name), len(variation))
+    if not max_len:
+        return calculate_orthographic_similarity(original_name, variation)
+    # Largest distance d with 1 - d / max_len >= min_similarity, rounded up so
+    # float error can only let a borderline pair through, never drop one
+    max_distance = math.floor((1.0 - min_similarity) * max_len + 1e-9)
+    if max_distance < 0:
+        return None
+    # With score_cutoff the result is exact up to the cutoff and cutoff + 1 beyond it
+    distance = Levenshtein.distance(original_name, variation, score_cutoff=max_distance)
+    if distance > max_distance:
+        return None
+    return 1.0 - (distance / max_len)
+
+# Define the boundaries for each similarity level with no overlaps
+PHONETIC_BOUNDARIES = {
+    "Light": (0.80, 1.00),   # High similarity range
+    "Medium": (0.60, 0.79),  # Moderate similarity range
+    "Far": (0.30, 0.59)      # Low similarity range
+}
+
+ORTHOGRAPHIC_BOUNDARIES = {
+    "Light": (0.70, 1.00),   # High similarity range
+    "Medium": (0.50, 0.69),  # Moderate similarity range
+    "Far": (0.20, 0.49)      # Low similarity range
+}
+
+def build_similarity_bands(
+    boundaries: Dict[str, Tuple[float, float]],
+    targets: Dict[str, float]
+) -> Tuple[Tuple[str, float, float, float], ...]:
+    """
+    Combine similarity boundaries with target percentages.
+
+    Returns:
+        (level, lower, upper, target_percentage) for every level with a non-zero target,
+        in boundary order
+    """
+    bands = []
+    for level, (lower, upper) in boundaries.items():
+        target_percentage = targets.get(level, 0.0)
+        if target_percentage == 0.0:
+            continue
+        bands.append((level, lower, upper, target_percentage))
+    return tuple(bands)
+
+def calculate_distribution_quality(scores: List[float], bands: Tuple[Tuple[str, float, float, float], ...]) -> float:
+    """Calculate how well a list of similarity scores matches the target bands"""
+    quality = 0.0
+    total_matched = 0
+    
+    for level, lower, upper, target_percentage in bands:
+        # Count scores in this range
+        count = sum(1 for score in scores if lower <= score <= upper)
+        target_count = int(target_percentage * len(scores))
+        
+        if target_count > 0:
+            # Calculate match quality with diminishing returns
+            match_ratio = count / target_count
+            #match_quality = 1.0 - math.exp(-match_ratio)  # Smooth curve
+            # Diminishing returns after target
+            # this gives 100% at target, then diminishing returns for exceeding
+            if match_ratio <= 1.0:
+                match_quality = match_ratio  # Linear up to target
+            else:    
+                match_quality = 1.0 - math.exp(-(match_ratio - 1.0))  
+            quality += target_percentage * match_quality
+            total_matched += count
+            
+            # print(
+            #     f"{level} similarity: {count}/{target_count} variations "
+            #     f"({match_quality:.3f} quality)"
+            # )
+    
+    # Penalize unmatched variations
+    unmatched = len(scores) - total_matched
+    if unmatched > 0:
+        penalty = 0.1 * (unmatched / len(scores))
+        quality = max(0.0, quality - penalty)
+        # print(f"Penalty of {penalty:.3f} applied for {unmatched} unmatched variations")
+    
+    return quality
+
+def calculate_pair_similarities(original_name: str, variations: List[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Calculate phonetic and orthographic similarity of each distinct variation to the original name.
+
+    Uses the persistent pair cache when one is configured. Note that the phonetic
+    algorithm choice is seeded from hash(), which differs between processes, so a
+    cached score is the one computed by whichever worker first saw the pair.
+
+    Args:
+        original_name: The original name
+        variations: List of name variations
+
+    Returns:
+        Dictionary mapping each variation to its (phonetic, orthographic) scores
+    """
+    distinct = list(dict.fromkeys(variations))
+    pair_cache = get_pair_cache()
+    scores = pair_cache.get_similarities(original_name, distinct) if pair_cache else {}
+
+    computed = {}
+    for variation in distinct:
+        if variation not in scores:
+            computed[variation] = (
+                calculate_phonetic_similarity(original_name, variation),
+                calculate_orthographic_similarity(original_name, variation)
+            )
+    if pair_cache and computed:
+        pair_cache.put_similarities(original_name, computed)
+
+    scores.update(computed)
+    return scores
+
+# Variations whose weighted similarity to an earlier one exceeds the threshold are duplicates
+UNIQUENESS_THRESHOLD = 0.99
+UNIQUENESS_PHONETIC_WEIGHT = 0.7
+UNIQUENESS_ORTHOGRAPHIC_WEIGHT = 0.3
+# (0.99 - 0.7) / 0.3 ~= 0.967 with phonetic similarity at its maximum of 1.0, less a safety margin
+UNIQUENESS_MIN_ORTHOGRAPHIC = 0.96
+
 def calculate_part_score(
     original_part: str,
     variations: List[str],
     phonetic_similarity: Dict[str, float],
     orthographic_similarity: Dict[str, float],
-    expected_count: int
+    expected_count: int,
+    phonetic_bands: Tuple = None,
+    orthographic_bands: Tuple = None,
+    deadline: Deadline = None
 ) -> Tuple[float, Dict]:
-    """Calculate scprintetrics for a single part (first or last name)"""
+    """
+    Calculate scprintetrics for a single part (first or last name)
+
+    phonetic_bands/orthographic_bands are the precomputed build_similarity_bands()
+    output for the similarity targets; they are built on the fly when omitted.
+    deadline, when given, is checked throughout the quadratic uniqueness pass and
+    raises DeadlineExceeded once expired.
+    """
     # print(f"\nCalculating part score for: {original_part}")
     # print(f"Number of variations: {len(variations)}")
     # print(f"Expected count: {expected_count}")
@@ -128,18 +298,10 @@ def calculate_part_score(
         print("No variations provided")
         return 0.0, {}
     
-    # Define the boundaries for each similarity level with no overlaps
-    phonetic_boundaries = {
-        "Light": (0.80, 1.00),   # High similarity range
-        "Medium": (0.60, 0.79),  # Moderate similarity range
-        "Far": (0.30, 0.59)      # Low similarity range
-    }
-    
-    orthographic_boundaries = {
-        "Light": (0.70, 1.00),   # High similarity range
-        "Medium": (0.50, 0.69),  # Moderate similarity range
-        "Far": (0.20, 0.49)      # Low similarity range
-    }
+    if phonetic_bands is None:
+        phonetic_bands = build_similarity_bands(PHONETIC_BOUNDARIES, phonetic_similarity)
+    if orthographic_bands is None:
+        orthographic_bands = build_similarity_bands(ORTHOGRAPHIC_BOUNDARIES, orthographic_similarity)
     
     # 1. Check if count matches expected count with adaptive tolerance
     # Tolerance increases with expected count to be more forgiving for larger sets
@@ -169,20 +331,28 @@ def calculate_part_score(
     
     # 2. Enhanced uniqueness check with similarity clustering
     unique_variations = []
-    for var in variations:
-        # Check if this variation is too similar to any existing unique variation
-        is_unique = True
-        for unique_var in unique_variations:
-            combined_similarity = (
-                calculate_phonetic_similarity(var, unique_var) * 0.7 +
-                calculate_orthographic_similarity(var, unique_var) * 0.3
-            )
-            if combined_similarity > 0.99:  # Very high similarity threshold
-                is_unique = False
-                #print(f"Variation '{var}' is too similar to existing variation '{unique_var}'")
-                break
-        if is_unique:
-            unique_variations.append(var)
+    with SCORING_STAGE.time(stage="uniqueness"):
+        for var in variations:
+            if deadline is not None:
+                deadline.check()
+            # Check if this variation is too similar to any existing unique variation
+            is_unique = True
+            for unique_var in unique_variations:
+                # Even a perfect phonetic match needs this much orthographic similarity
+                # to pass the threshold, so most pairs are rejected before phonetics run
+                orthographic = orthographic_similarity_at_least(var, unique_var, UNIQUENESS_MIN_ORTHOGRAPHIC)
+                if orthographic is None:
+                    continue
+                combined_similarity = (
+                    calculate_phonetic_similarity(var, unique_var) * UNIQUENESS_PHONETIC_WEIGHT +
+                    orthographic * UNIQUENESS_ORTHOGRAPHIC_WEIGHT
+                )
+                if combined_similarity > UNIQUENESS_THRESHOLD:  # Very high similarity threshold
+                    is_unique = False
+                    #print(f"Variation '{var}' is too similar to existing variation '{unique_var}'")
+                    break
+            if is_unique:
+                unique_variations.append(var)
     
     uniqueness_score = len(unique_variations) / len(variations) if variations else 0
     # if uniqueness_score < 1.0:
@@ -220,9 +390,9 @@ def calculate_part_score(
     phonetic_scores = []
     orthographic_scores = []
     
+    pair_scores = calculate_pair_similarities(original_part, variations)
     for variation in unique_variations:
-        p_score = calculate_phonetic_similarity(original_part, variation)
-        o_score = calculate_orthographic_similarity(original_part, variation)
+        p_score, o_score = pair_scores[variation]
         
         phonetic_scores.append(p_score)
         orthographic_scores.append(o_score)
@@ -238,52 +408,8 @@ def calculate_part_score(
     orthographic_scores.sort()
     
     # Calculate quality scores with improved distribution matching
-    def calculate_distribution_quality(scores, boundaries, targets):
-        quality = 0.0
-        total_matched = 0
-        
-        for level, (lower, upper) in boundaries.items():
-            target_percentage = targets.get(level, 0.0)
-            if target_percentage == 0.0:
-                continue
-                
-            # Count scores in this range
-            count = sum(1 for score in scores if lower <= score <= upper)
-            target_count = int(target_percentage * len(scores))
-            
-            if target_count > 0:
-                # Calculate match quality with diminishing returns
-                match_ratio = count / target_count
-                #match_quality = 1.0 - math.exp(-match_ratio)  # Smooth curve
-                # Diminishing returns after target
-                # this gives 100% at target, then diminishing returns for exceeding
-                if match_ratio <= 1.0:
-                    match_quality = match_ratio  # Linear up to target
-                else:    
-                    match_quality = 1.0 - math.exp(-(match_ratio - 1.0))  
-                quality += target_percentage * match_quality
-                total_matched += count
-                
-                # print(
-                #     f"{level} similarity: {count}/{target_count} variations "
-                #     f"({match_quality:.3f} quality)"
-                # )
-        
-        # Penalize unmatched variations
-        unmatched = len(scores) - total_matched
-        if unmatched > 0:
-            penalty = 0.1 * (unmatched / len(scores))
-            quality = max(0.0, quality - penalty)
-            # print(f"Penalty of {penalty:.3f} applied for {unmatched} unmatched variations")
-        
-        return quality
-    
-    phonetic_quality = calculate_distribution_quality(
-        phonetic_scores, phonetic_boundaries, phonetic_similarity
-    )
-    orthographic_quality = calculate_distribution_quality(
-        orthographic_scores, orthographic_boundaries, orthographic_similarity
-    )
+    phonetic_quality = calculate_distribution_quality(phonetic_scores, phonetic_bands)
+    orthographic_quality = calculate_distribution_quality(orthographic_scores, orthographic_bands)
     
     # Calculate combined similarity score
     similarity_score = (phonetic_quality + orthographic_quality) / 2  # Average of both similarities
@@ -355,8 +481,8 @@ def calculate_part_score(
         },
         "variations": [{
             "variation": var,
-            "phonetic_score": float(calculate_phonetic_similarity(original_part, var)),
-            "orthographic_score": float(calculate_orthographic_similarity(original_part, var)),
+            "phonetic_score": float(pair_scores[var][0]),
+            "orthographic_score": float(pair_scores[var][1]),
             "length_ratio": float(len(var)) / float(len(original_part))
         } for var in variations]
     }
@@ -365,7 +491,7 @@ def calculate_part_score(
 
 def get_name_part_weights(name: str) -> dict:
     """Generate weights for different name parts based on name characteristics, with randomness."""
-    random.seed(hash(name) % 10000)
+    rng = random.Random(hash(name) % 10000)
     name_parts = name.split()
     if len(name_parts) < 2:
         return {"first_name_weight": 1.0, "last_name_weight": 0.0}
@@ -374,7 +500,7 @@ def get_name_part_weights(name: str) -> dict:
     weights = []
     for length in lengths:
         base_weight = length / total_length
-        randomized_weight = base_weight * random.uniform(0.8, 1.2)  # 20% randomness
+        randomized_weight = base_weight * rng.uniform(0.8, 1.2)  # 20% randomness
         weights.append(randomized_weight)
     total_weight = sum(weights)
     normalized_weights = [w / total_weight for w in weights]
@@ -390,17 +516,87 @@ def get_name_part_weights(name: str) -> dict:
             "last_name_weight": normalized_weights[1]
         }
 
+@dataclass(frozen=True)
+class SeedContext:
+    """Everything about a seed name that does not depend on the submitted variations"""
+    original_name: str
+    first_name: str
+    last_name: Optional[str]
+    part_weights: Dict[str, float]
+    has_rule_requirements: bool
+    effective_target_rules: Tuple[str, ...]
+    target_percentage: float
+
+@lru_cache(maxsize=SEED_CONTEXT_CACHE_SIZE)
+def _build_seed_context(original_name: str, selected_rules: Optional[Tuple[str, ...]], rule_percentage: float) -> SeedContext:
+    # Split the original name into first and last name
+    name_parts = original_name.split()
+    if len(name_parts) < 2:
+        first_name = original_name
+        last_name = None
+    else:
+        first_name = name_parts[0]
+        last_name = name_parts[-1]
+
+    # Filter out rules that are impossible for the given name structure
+    effective_target_rules = []
+    for rule in selected_rules or ():
+        if rule in ('name_parts_permutations', 'initial_only_first_name', 'shorten_name_to_initials') and len(name_parts) < 2:
+            print(f"Skipping impossible rule '{rule}' for single-part name '{original_name}'")
+            continue
+        if rule in ('replace_spaces_with_random_special_characters', 'remove_all_spaces') and ' ' not in original_name:
+            print(f"Skipping impossible rule '{rule}' for name without spaces '{original_name}'")
+            continue
+        effective_target_rules.append(rule)
+
+    return SeedContext(
+        original_name=original_name,
+        first_name=first_name,
+        last_name=last_name,
+        part_weights=get_name_part_weights(original_name),
+        has_rule_requirements=selected_rules is not None,
+        effective_target_rules=tuple(effective_target_rules),
+        target_percentage=rule_percentage / 100.0 if effective_target_rules else 0.0  # Convert to fraction
+    )
+
+def get_seed_context(original_name: str, rule_based: Dict[str, Any] = None) -> SeedContext:
+    """
+    Return the SeedContext for a seed name under the given rule settings.
+
+    Contexts are cached in a bounded LRU keyed by (seed name, selected rules,
+    rule percentage), so every miner submitting the same seed in a round
+    shares one. Treat the returned object as read-only.
+    """
+    if rule_based and "selected_rules" in rule_based:
+        selected_rules = tuple(rule_based.get("selected_rules", []))
+        rule_percentage = rule_based.get("rule_percentage", 30)
+    else:
+        selected_rules = None
+        rule_percentage = 30
+    return _build_seed_context(original_name, selected_rules, rule_percentage)
+
+register_lru_cache("seed_context", _build_seed_context)
+register_lru_cache("phonetic_profile", get_phonetic_profile)
+
 def calculate_variation_quality(
     original_name: str,  # Full name as a string
     variations: List[str],
     phonetic_similarity: Dict[str, float] = None,
     orthographic_similarity: Dict[str, float] = None,
     expected_count: int = 10,
-    rule_based: Dict[str, Any] = None  # New parameter for rule-based metadata
+    rule_based: Dict[str, Any] = None,  # New parameter for rule-based metadata
+    phonetic_bands: Tuple = None,
+    orthographic_bands: Tuple = None,
+    deadline: Deadline = None
 ) -> Tuple[float, Dict]:
     """
     Calculate the quality of execution vectors (name variations) for threat detection.
     Returns both the quality score and detailed metrics.
+
+    phonetic_bands/orthographic_bands are optional precomputed similarity bands
+    (see build_similarity_bands) passed through to calculate_part_score.
+    deadline is an optional Deadline; DeadlineExceeded is raised if it expires
+    before the name is fully scored.
     """
     #print(f"\n{'='*50}")
     #print(f"Calculating variation quality for: {original_name}")
@@ -413,57 +609,41 @@ def calculate_variation_quality(
     if orthographic_similarity is None:
         orthographic_similarity = {"Medium": 1.0}
 
+    # Seed-level inputs (name split, part weights, applicable rules) are shared across miners
+    seed_context = get_seed_context(original_name, rule_based)
+    part_weights = seed_context.part_weights
+    first_name = seed_context.first_name
+    last_name = seed_context.last_name
+
     # First, calculate rule compliance to identify rule-based variations
     rule_compliance_score = 0.0
     rule_compliance_metrics = {}
     rule_compliant_variations = set()
-    target_percentage = 0.0
-    effective_target_rules = []
+    target_percentage = seed_context.target_percentage
+    effective_target_rules = list(seed_context.effective_target_rules)
 
-    if rule_based and "selected_rules" in rule_based:
+    if seed_context.has_rule_requirements:
         #print("\nCalculating rule-based compliance score:")
-        target_rules = rule_based.get("selected_rules", [])
-        
-        # Filter out rules that are impossible for the given name structure
-        for rule in target_rules:
-            if rule in ('name_parts_permutations', 'initial_only_first_name', 'shorten_name_to_initials') and len(original_name.split()) < 2:
-                print(f"Skipping impossible rule '{rule}' for single-part name '{original_name}'")
-                continue
-            if rule in ('replace_spaces_with_random_special_characters', 'remove_all_spaces') and ' ' not in original_name:
-                print(f"Skipping impossible rule '{rule}' for name without spaces '{original_name}'")
-                continue
-            effective_target_rules.append(rule)
-
         if effective_target_rules:
-            target_percentage = rule_based.get("rule_percentage", 30) / 100.0  # Convert to fraction
-            rule_compliance_score, rule_compliance_metrics = calculate_rule_compliance_score(
-                original_name,
-                variations,
-                effective_target_rules,
-                target_percentage
-            )
+            with SCORING_STAGE.time(stage="rule_compliance"):
+                rule_compliance_score, rule_compliance_metrics = calculate_rule_compliance_score(
+                    original_name,
+                    variations,
+                    effective_target_rules,
+                    target_percentage
+                )
             if "rules_satisfied_by_variation" in rule_compliance_metrics:
                 rule_compliant_variations = set(rule_compliance_metrics["rules_satisfied_by_variation"].keys())
     else:
         print("No rule-based requirements specified")
+    if deadline is not None:
+        deadline.check()
 
     # Separate variations into rule-compliant and non-rule-compliant
     non_rule_compliant_variations = [
         var for var in variations if var not in rule_compliant_variations
     ]
     
-    # Split the original name into first and last name
-    name_parts = original_name.split()
-    part_weights = get_name_part_weights(original_name)
-    if len(name_parts) < 2:
-        first_name = original_name
-        last_name = None
-        #print(f"Could not split name '{original_name}' into first and last name")
-    else:
-        first_name = name_parts[0]
-        last_name = name_parts[-1]
-        #print(f"Using first name: '{first_name}', last name: '{last_name}'")
-    
     # Process NON-RULE-COMPLIANT variations for base quality score
     first_name_variations = []
     last_name_variations = []
@@ -495,26 +675,34 @@ def calculate_variation_quality(
     
     # Calculate score for first name (non-rule-compliant part)
     #print("\nCalculating first name score (non-rule-compliant):")
-    first_name_score, first_metrics = calculate_part_score(
-        first_name,
-        first_name_variations,
-        phonetic_similarity,
-        orthographic_similarity,
-        expected_base_count
-    )
+    with SCORING_STAGE.time(stage="part_score"):
+        first_name_score, first_metrics = calculate_part_score(
+            first_name,
+            first_name_variations,
+            phonetic_similarity,
+            orthographic_similarity,
+            expected_base_count,
+            phonetic_bands,
+            orthographic_bands,
+            deadline
+        )
     
     # Calculate score for last name if available
     last_name_score = 0.0
     last_metrics = {}
     if last_name:
         #print("\nCalculating last name score (non-rule-compliant):")
-        last_name_score, last_metrics = calculate_part_score(
-            last_name,
-            last_name_variations,
-            phonetic_similarity,
-            orthographic_similarity,
-            expected_base_count
-        )
+        with SCORING_STAGE.time(stage="part_score"):
+            last_name_score, last_metrics = calculate_part_score(
+                last_name,
+                last_name_variations,
+                phonetic_similarity,
+                orthographic_similarity,
+                expected_base_count,
+                phonetic_bands,
+                orthographic_bands,
+                deadline
+            )
         
         # Apply penalty for missing last names in non-rule-compliant variations
         if len(last_name_variations) < len(non_rule_compliant_variations):
@@ -542,7 +730,7 @@ def calculate_variation_quality(
     
     # If rules were requested but none were applicable to this name, adjust weights
     # to base the score entirely on similarity.
-    if rule_based and "selected_rules" in rule_based and not effective_target_rules:
+    if seed_context.has_rule_requirements and not effective_target_rules:
         print(f"No rules applicable for '{original_name}', adjusting weights. Base score will be final score.")
         base_weight = 1.0
         rule_compliance_weight = 0.0
@@ -844,23 +1032,26 @@ def calculate_rule_compliance_score(
             "score": 0.0
         }
     
-    # Evaluate rule compliance
+    # Classify every variation against the target rules in one pass
+    # satisfied_masks maps each distinct variation to the bitmask of rules it satisfied
+    satisfied_masks = classify_variations(original_name, variations, target_rules)
+
     # compliant_variations_by_rule is Dict[str (rule_name), List[str (variation)]]
-    compliant_variations_by_rule, compliance_ratio_from_evaluator = evaluate_rule_compliance(
-        original_name, 
-        variations, 
-        target_rules
-    )
-    
-    # Create a dictionary to map each compliant variation to the list of rules it satisfied
+    # rules_satisfied_by_variation maps each compliant variation to the list of rules it satisfied
+    compliant_variations_by_rule = {rule: [] for rule in target_rules}
     rules_satisfied_by_variation = {}
-    for rule, rule_compliant_variations_list in compliant_variations_by_rule.items():
-        for variation in rule_compliant_variations_list:
-            if variation not in rules_satisfied_by_variation:
-                rules_satisfied_by_variation[variation] = []
-            # Ensure no duplicate rules (though unlikely with current evaluators)
-            if rule not in rules_satisfied_by_variation[variation]:
-                 rules_satisfied_by_variation[variation].append(rule)
+    for variation in variations:
+        mask = satisfied_masks[variation]
+        if not mask:
+            continue
+        for rule in target_rules:
+            if mask & RULE_BITS.get(rule, 0):
+                compliant_variations_by_rule[rule].append(variation)
+        if variation not in rules_satisfied_by_variation:
+            rules_satisfied_by_variation[variation] = [
+                rule for rule in compliant_variations_by_rule if mask & RULE_BITS.get(rule, 0)
+            ]
+    compliance_ratio_from_evaluator = len(rules_satisfied_by_variation) / len(variations)
 
     # Count unique variations that satisfied at least one rule (from the target_rules)
     overall_compliant_count = len(rules_satisfied_by_variation)
@@ -5,6 +5,7 @@
 import random
 import re
 from typing import List, Dict, Tuple, Any, Set
+from app.utils.affixes import TITLES, SUFFIXES, split_leading_title
 
 def generate_replace_spaces_with_random_special_characters(original_name: str) -> str:
     """Generate a variation by replacing spaces with special characters"""
@@ -156,15 +157,8 @@ def generate_remove_random_special_character(original_name: str) -> str:
 
 def generate_remove_title(original_name: str) -> str:
     """Generate a variation by removing a title"""
-    titles = ["Mr.", "Mrs.", "Ms.", "Mr", "Mrs", "Ms", "Miss", "Dr.", "Dr",
-              "Prof.", "Prof", "Sir", "Lady", "Lord", "Dame", "Master", "Mistress",
-              "Rev.", "Hon.", "Capt.", "Col.", "Lt.", "Sgt.", "Maj."]
-    
-    for title in titles:
-        if original_name.startswith(title + " "):
-            return original_name[len(title)+1:]
-    
-    return original_name
+    rest = split_leading_title(original_name)
+    return original_name if rest is None else rest
 
 def generate_remove_all_spaces(original_name: str) -> str:
     """Generate a variation by removing all spaces"""
@@ -192,16 +186,12 @@ def generate_insert_random_letter(original_name: str) -> str:
 
 def generate_add_random_leading_title(original_name: str) -> str:
     """Generate a variation by adding a title at the beginning"""
-    titles = ["Mr.", "Mrs.", "Ms.", "Mr", "Mrs", "Ms", "Miss", "Dr.", "Dr",
-              "Prof.", "Prof", "Sir", "Lady", "Lord", "Dame", "Master", "Mistress",
-              "Rev.", "Hon.", "Capt.", "Col.", "Lt.", "Sgt.", "Maj."]
-    title = random.choice(titles)
+    title = random.choice(TITLES)
     return title + " " + original_name
 
 def generate_add_random_trailing_title(original_name: str) -> str:
     """Generate a variation by adding a suffix at the end"""
-    suffixes = ["Jr.", "Sr.", "III", "IV", "V", "PhD", "MD", "Esq.", "Jr", "Sr"]
-    suffix = random.choice(suffixes)
+    suffix = random.choice(SUFFIXES)
     return original_name + " " + suffix
 
 def generate_shorten_name_to_initials(original_name: str) -> str:
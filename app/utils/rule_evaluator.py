@@ -2,370 +2,380 @@
 # Copyright © 2023 Yuma Rao
 # Copyright © 2023 YANEZ - MIID Team
 
+import enum
 import random
 import re
-from typing import List, Dict, Tuple, Any, Set
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import List, Dict, Tuple, Any, Set, NamedTuple, Optional
 import Levenshtein
 import jellyfish
+from app.utils.affixes import split_leading_title, split_trailing_suffix
+from app.utils.pair_cache import get_pair_cache
+from app.utils.metrics import CACHE_LOOKUPS
 
 # List of rules that can be checked algorithmically
 # These are basic heuristics to check if a variation follows a specific rule
 # More complex rules would need more sophisticated checking methods
 
-def is_space_replaced_with_special_chars(original: str, variation: str) -> bool:
-    """Check if spaces in the original are replaced with special characters"""
-    if original == variation:
-        return False
-    if ' ' not in original:
+VOWELS = 'aeiou'
+SPECIAL_CHARS = '!@#$%^&*()_+-=[]{}|;:,.<>?'
+
+
+class SingleEdit(NamedTuple):
+    op: str           # 'delete', 'insert' or 'substitute'
+    position: int     # Index in the original (delete, substitute) or the variation (insert)
+    char: str         # Character deleted, inserted or substituted in
+    char_class: str   # 'vowel', 'consonant', 'special' or 'other'
+
+def char_class(char: str) -> str:
+    if char in VOWELS:
+        return 'vowel'
+    if char.isalpha():
+        return 'consonant'
+    if char in SPECIAL_CHARS:
+        return 'special'
+    return 'other'
+
+def single_edit(original: str, variation: str) -> Optional[SingleEdit]:
+    """
+    Return the edit if the strings differ by exactly one insert, delete or substitute.
+
+    One two-pointer pass: match the common prefix, then the common suffix of
+    what is left; a single edit leaves exactly one unmatched character on at
+    most one side. O(n) and no slicing. When an inserted or deleted character
+    sits in a run of equal characters any position in the run is valid; the
+    prefix scan runs through the run, so its last position is returned
+    ("aa" -> "a" deletes at 1).
+
+    Args:
+        original: The original name
+        variation: The name variation
+
+    Returns:
+        SingleEdit, or None if the strings are equal or more than one edit apart
+    """
+    n, m = len(original), len(variation)
+    if abs(n - m) > 1:
+        return None
+    shorter = n if n < m else m
+    p = 0
+    while p < shorter and original[p] == variation[p]:
+        p += 1
+    i, j = n - 1, m - 1
+    while i >= p and j >= p and original[i] == variation[j]:
+        i -= 1
+        j -= 1
+    if n == m + 1 and j == p - 1:
+        char = original[p]
+        return SingleEdit('delete', p, char, char_class(char))
+    if m == n + 1 and i == p - 1:
+        char = variation[p]
+        return SingleEdit('insert', p, char, char_class(char))
+    if n == m and i == p and j == p:
+        char = variation[p]
+        return SingleEdit('substitute', p, char, char_class(char))
+    return None
+
+
+class PairFeatures:
+    """
+    Features of one (original, variation) pair shared by all rule checks.
+
+    Every feature is computed lazily and at most once, so a rule set only pays
+    for what its checks actually read and the expensive parts (Levenshtein
+    distance, positional diffs) are never recomputed per rule. Single-edit
+    rules read the O(n) single_edit() alignment instead of the distance.
+    """
+
+    def __init__(self, original: str, variation: str):
+        self.original = original
+        self.variation = variation
+        self.same = original == variation
+        self.len_delta = len(variation) - len(original)
+
+    @cached_property
+    def distance(self) -> int:
+        return Levenshtein.distance(self.original, self.variation)
+
+    @cached_property
+    def single_edit(self) -> Optional[SingleEdit]:
+        if self.same or not -1 <= self.len_delta <= 1:
+            return None
+        # Most pairs are several edits apart; the bounded C distance rejects
+        # them faster than the Python alignment loop can
+        if Levenshtein.distance(self.original, self.variation, score_cutoff=1) > 1:
+            return None
+        return single_edit(self.original, self.variation)
+
+    @cached_property
+    def diff_positions(self) -> List[int]:
+        """Positions where the strings differ (only meaningful for equal lengths)"""
+        return [i for i, (a, b) in enumerate(zip(self.original, self.variation)) if a != b]
+
+    @cached_property
+    def substitution_counts(self) -> Dict[str, int]:
+        """Count positional changes that stay within the same character class"""
+        counts = {'vowel': 0, 'consonant': 0, 'special': 0}
+        for i in self.diff_positions:
+            a, b = self.original[i], self.variation[i]
+            if a in VOWELS and b in VOWELS:
+                counts['vowel'] += 1
+            if a not in VOWELS and b not in VOWELS:
+                counts['consonant'] += 1
+            if a in SPECIAL_CHARS and b in SPECIAL_CHARS:
+                counts['special'] += 1
+        return counts
+
+    @property
+    def deleted(self) -> Optional[SingleEdit]:
+        """The edit if the pair differs by exactly one deletion"""
+        edit = self.single_edit
+        return edit if edit is not None and edit.op == 'delete' else None
+
+    @property
+    def inserted(self) -> Optional[SingleEdit]:
+        """The edit if the pair differs by exactly one insertion"""
+        edit = self.single_edit
+        return edit if edit is not None and edit.op == 'insert' else None
+
+    @cached_property
+    def has_double_letter(self) -> bool:
+        return any(self.original[i] == self.original[i + 1] for i in range(len(self.original) - 1))
+
+    @cached_property
+    def space_count(self) -> int:
+        return self.original.count(' ')
+
+    @cached_property
+    def original_no_spaces(self) -> str:
+        return self.original.replace(' ', '')
+
+    @cached_property
+    def original_parts(self) -> List[str]:
+        return self.original.split()
+
+    @cached_property
+    def variation_parts(self) -> List[str]:
+        return self.variation.split()
+
+
+def _space_replaced_with_special_chars(f: PairFeatures) -> bool:
+    if f.same or not f.space_count:
         return False
-    
-    # Get positions of spaces in original
-    space_positions = [i for i, char in enumerate(original) if char == ' ']
-    
     # Check if variation has no spaces but has special chars at space positions
-    if ' ' in variation:
+    if ' ' in f.variation:
         return False
-    
     # Check if length is compatible (allowing for minor changes)
-    if abs(len(variation) - len(original)) > len(space_positions):
+    if abs(f.len_delta) > f.space_count:
         return False
-    
-    # Try to map the variation to the original with spaces removed
-    original_no_spaces = original.replace(' ', '')
-    
-    # Use Levenshtein distance to check if the variation is close to original with spaces removed
-    # but with special characters potentially at the space positions
-    lev_distance = Levenshtein.distance(original_no_spaces, variation)
-    
-    # Allow some flexibility: each space can be replaced by a special char
-    return lev_distance <= len(space_positions) + 1
+    # Each space can be replaced by a special char, allow some flexibility
+    return Levenshtein.distance(f.original_no_spaces, f.variation) <= f.space_count + 1
 
-def is_double_letter_replaced(original: str, variation: str) -> bool:
-    """Check if a double letter in the original is replaced with a single letter"""
-    # Find double letters in original
-    double_letters = []
-    for i in range(len(original) - 1):
-        if original[i] == original[i+1]:
-            double_letters.append(original[i])
-    
-    if not double_letters:
+def _double_letter_replaced(f: PairFeatures) -> bool:
+    if f.len_delta != -1 or not f.has_double_letter:
         return False
-    
-    # Check if variation has one fewer character and is otherwise similar
-    if len(variation) != len(original) - 1:
+    return 1 <= f.distance <= 2
+
+def _vowel_replaced(f: PairFeatures) -> bool:
+    if f.same or f.len_delta != 0:
         return False
-    
-    # Check if Levenshtein distance is appropriate for this transformation
-    lev_distance = Levenshtein.distance(original, variation)
-    return 1 <= lev_distance <= 2
+    vowel_changes = f.substitution_counts['vowel']
+    return vowel_changes >= 1 and len(f.diff_positions) - vowel_changes <= 1
 
-def is_vowel_replaced(original: str, variation: str) -> bool:
-    """Check if some vowels are replaced with different vowels"""
-    vowels = 'aeiou'
-    
-    # Explicitly check if the variation is identical to the original
-    if original == variation:
+def _consonant_replaced(f: PairFeatures) -> bool:
+    if f.same or f.len_delta != 0:
         return False
+    consonant_changes = f.substitution_counts['consonant']
+    return consonant_changes >= 1 and len(f.diff_positions) - consonant_changes <= 1
 
-    # Check if length is the same
-    if len(original) != len(variation):
+def _special_character_replaced(f: PairFeatures) -> bool:
+    if f.same or f.len_delta != 0:
         return False
-    
-    # Count changes in vowels
-    vowel_changes = 0
-    other_changes = 0
-    
-    for i in range(len(original)):
-        if original[i] != variation[i]:
-            if original[i] in vowels and variation[i] in vowels:
-                vowel_changes += 1
-            else:
-                other_changes += 1
-    
-    # Should have at least one vowel change and few other changes
-    return vowel_changes >= 1 and other_changes <= 1
+    special_changes = f.substitution_counts['special']
+    return special_changes >= 1 and len(f.diff_positions) - special_changes <= 1
 
-def is_consonant_replaced(original: str, variation: str) -> bool:
-    """Check if some consonants are replaced with different consonants"""
-    vowels = 'aeiou'
-    
-    # Explicitly check if the variation is identical to the original
-    if original == variation:
+def _letters_swapped(f: PairFeatures) -> bool:
+    if f.same or f.len_delta != 0:
         return False
+    diffs = f.diff_positions
+    # Should have exactly 2 adjacent differences for a swap
+    if len(diffs) != 2 or diffs[1] - diffs[0] != 1:
+        return False
+    return (f.original[diffs[0]] == f.variation[diffs[1]] and
+            f.original[diffs[1]] == f.variation[diffs[0]])
+
+def _letter_removed(f: PairFeatures) -> bool:
+    return f.deleted is not None
 
-    # Check if length is the same
-    if len(original) != len(variation):
+def _vowel_removed(f: PairFeatures) -> bool:
+    # All positions whose removal yields the variation hold the same character,
+    # so the one reported by the alignment is representative
+    edit = f.deleted
+    return edit is not None and edit.char_class == 'vowel'
+
+def _consonant_removed(f: PairFeatures) -> bool:
+    edit = f.deleted
+    return edit is not None and edit.char_class == 'consonant'
+
+def _special_removed(f: PairFeatures) -> bool:
+    edit = f.deleted
+    return edit is not None and edit.char_class == 'special'
+
+def _title_removed(f: PairFeatures) -> bool:
+    if f.same:
         return False
-    
-    # Count changes in consonants
-    consonant_changes = 0
-    other_changes = 0
-    
-    for i in range(len(original)):
-        if original[i] != variation[i]:
-            if original[i] not in vowels and variation[i] not in vowels:
-                consonant_changes += 1
-            else:
-                other_changes += 1
-    
-    # Should have at least one consonant change and few other changes
-    return consonant_changes >= 1 and other_changes <= 1
+    # Check if title was removed from beginning, with some name manipulation
+    rest = split_leading_title(f.original)
+    if rest is None:
+        return False
+    return rest == f.variation or Levenshtein.distance(f.variation, rest, score_cutoff=2) <= 2
 
-def is_letters_swapped(original: str, variation: str) -> bool:
-    """Check if some adjacent letters are swapped"""
-    if original == variation:
+def _name_abbreviated(f: PairFeatures) -> bool:
+    if f.same or len(f.original_parts) != len(f.variation_parts):
         return False
-    # Check if length is the same
-    if len(original) != len(variation):
+    # Check if each part is a shortened version
+    for orig, var in zip(f.original_parts, f.variation_parts):
+        if len(var) >= len(orig) or not orig.startswith(var):
+            return False
+    return True
+
+def _all_spaces_removed(f: PairFeatures) -> bool:
+    if f.same or not f.space_count:
         return False
-    
-    # Count differences and detect swaps
-    diffs = []
-    for i in range(len(original)):
-        if original[i] != variation[i]:
-            diffs.append(i)
-    
-    # Should have exactly 2 differences for a swap
-    if len(diffs) != 2:
+    return f.variation == f.original_no_spaces
+
+def _letter_duplicated(f: PairFeatures) -> bool:
+    edit = f.inserted
+    if edit is None:
+        return False
+    # The inserted character doubles a letter iff it sits next to a copy of itself
+    pos, char = edit.position, edit.char
+    return ((pos > 0 and f.variation[pos-1] == char) or
+            (pos + 1 < len(f.variation) and f.variation[pos+1] == char))
+
+def _random_letter_inserted(f: PairFeatures) -> bool:
+    return f.inserted is not None
+
+def _title_added(f: PairFeatures) -> bool:
+    if f.same:
         return False
-    
-    # Check if differences are adjacent
-    if abs(diffs[0] - diffs[1]) != 1:
+    # Check if title was added at beginning, with some name manipulation
+    rest = split_leading_title(f.variation)
+    if rest is None:
         return False
-    
-    # Check if it's a swap
-    return (original[diffs[0]] == variation[diffs[1]] and
-            original[diffs[1]] == variation[diffs[0]])
+    return rest.startswith(f.original) or Levenshtein.distance(f.original, rest, score_cutoff=2) <= 2
+
+def _suffix_added(f: PairFeatures) -> bool:
+    if f.same:
+        return False
+    # Check if suffix was added at end, with some name manipulation
+    rest = split_trailing_suffix(f.variation)
+    return rest is not None and Levenshtein.distance(f.original, rest, score_cutoff=2) <= 2
+
+def _initials_only(f: PairFeatures) -> bool:
+    parts = f.original_parts
+    if f.same or len(parts) < 2:
+        return False
+    initials = [p[0] for p in parts]
+    return f.variation in (".".join(initials) + ".", ". ".join(initials) + ".", "".join(initials))
+
+def _name_parts_permutation(f: PairFeatures) -> bool:
+    if f.same:
+        return True # This is a special case, a permutation of 1 is the same
+    original_parts, variation_parts = f.original_parts, f.variation_parts
+    if len(original_parts) != len(variation_parts) or len(original_parts) < 2:
+        return False
+    return sorted(original_parts) == sorted(variation_parts) and original_parts != variation_parts
+
+def _first_name_initial(f: PairFeatures) -> bool:
+    parts = f.original_parts
+    if f.same or len(parts) < 2:
+        return False
+    rest = " ".join(parts[1:])
+    return f.variation in (parts[0][0] + ". " + rest, parts[0][0] + "." + rest)
+
+
+def is_space_replaced_with_special_chars(original: str, variation: str) -> bool:
+    """Check if spaces in the original are replaced with special characters"""
+    return _space_replaced_with_special_chars(PairFeatures(original, variation))
+
+def is_double_letter_replaced(original: str, variation: str) -> bool:
+    """Check if a double letter in the original is replaced with a single letter"""
+    return _double_letter_replaced(PairFeatures(original, variation))
+
+def is_vowel_replaced(original: str, variation: str) -> bool:
+    """Check if some vowels are replaced with different vowels"""
+    return _vowel_replaced(PairFeatures(original, variation))
+
+def is_consonant_replaced(original: str, variation: str) -> bool:
+    """Check if some consonants are replaced with different consonants"""
+    return _consonant_replaced(PairFeatures(original, variation))
+
+def is_letters_swapped(original: str, variation: str) -> bool:
+    """Check if some adjacent letters are swapped"""
+    return _letters_swapped(PairFeatures(original, variation))
 
 def is_letter_removed(original: str, variation: str) -> bool:
     """Check if a letter is removed"""
-    # Check if variation is one character shorter
-    if len(variation) != len(original) - 1:
-        return False
-    
-    # Use Levenshtein to check if it's a single character removal
-    return Levenshtein.distance(original, variation) == 1
+    return _letter_removed(PairFeatures(original, variation))
 
 def is_vowel_removed(original: str, variation: str) -> bool:
     """Check if a vowel is removed"""
-    vowels = 'aeiou'
-    
-    # Check if variation is one character shorter
-    if len(variation) != len(original) - 1:
-        return False
-    
-    # Try removing each vowel and see if we get the variation
-    for i, char in enumerate(original):
-        if char in vowels:
-            test = original[:i] + original[i+1:]
-            if test == variation:
-                return True
-    
-    return False
+    return _vowel_removed(PairFeatures(original, variation))
 
 def is_consonant_removed(original: str, variation: str) -> bool:
     """Check if a consonant is removed"""
-    vowels = 'aeiou'
-    
-    # Check if variation is one character shorter
-    if len(variation) != len(original) - 1:
-        return False
-    
-    # Try removing each consonant and see if we get the variation
-    for i, char in enumerate(original):
-        if char not in vowels and char.isalpha():
-            test = original[:i] + original[i+1:]
-            if test == variation:
-                return True
-    
-    return False
+    return _consonant_removed(PairFeatures(original, variation))
 
 def is_special_character_replaced(original: str, variation: str) -> bool:
     """Check if a special character is replaced with a different one"""
-    special_chars = '!@#$%^&*()_+-=[]{}|;:,.<>?'
-    
-    if original == variation:
-        return False
-    if len(original) != len(variation):
-        return False
-    
-    # Count changes in special characters
-    special_changes = 0
-    other_changes = 0
-    
-    for i in range(len(original)):
-        if original[i] != variation[i]:
-            if original[i] in special_chars and variation[i] in special_chars:
-                special_changes += 1
-            else:
-                other_changes += 1
-    
-    # Should have at least one special char change and few other changes
-    return special_changes >= 1 and other_changes <= 1
+    return _special_character_replaced(PairFeatures(original, variation))
 
 def is_random_special_removed(original: str, variation: str) -> bool:
     """Check if a special character is removed"""
-    special_chars = '!@#$%^&*()_+-=[]{}|;:,.<>?'
-    
-    # Check if variation is one character shorter
-    if len(variation) != len(original) - 1:
-        return False
-    
-    # Try removing each special char and see if we get the variation
-    for i, char in enumerate(original):
-        if char in special_chars:
-            test = original[:i] + original[i+1:]
-            if test == variation:
-                return True
-    
-    return False
+    return _special_removed(PairFeatures(original, variation))
 
 def is_title_removed(original: str, variation: str) -> bool:
     """Check if a title is removed from the name"""
-    if original == variation:
-        return False
-    titles = ["Mr.", "Mrs.", "Ms.", "Mr", "Mrs", "Ms", "Miss", "Dr.", "Dr",
-              "Prof.", "Prof", "Sir", "Lady", "Lord", "Dame", "Master", "Mistress",
-              "Rev.", "Hon.", "Capt.", "Col.", "Lt.", "Sgt.", "Maj."]
-    
-    for title in titles:
-        # Check if title was removed from beginning
-        if original.startswith(title + " "):
-            test = original[len(title)+1:]
-            if test == variation:
-                return True
-        # Check with some name manipulation
-        if original.startswith(title + " ") and Levenshtein.distance(variation, original[len(title)+1:]) <= 2:
-            return True
-    
-    return False
+    return _title_removed(PairFeatures(original, variation))
 
 def is_name_abbreviated(original: str, variation: str) -> bool:
     """Check if name parts are abbreviated (simple heuristic)"""
-    if original == variation:
-        return False
-    original_parts = original.split()
-    variation_parts = variation.split()
-    
-    if len(original_parts) != len(variation_parts):
-        return False
-    
-    # Check if each part is a shortened version
-    for orig, var in zip(original_parts, variation_parts):
-        if len(var) >= len(orig) or not orig.startswith(var):
-            return False
-    
-    return True
+    return _name_abbreviated(PairFeatures(original, variation))
 
 def is_all_spaces_removed(original: str, variation: str) -> bool:
     """Check if all spaces are removed"""
-    if original == variation:
-        return False
-    if ' ' not in original:
-        return False
-    
-    return variation == original.replace(' ', '')
+    return _all_spaces_removed(PairFeatures(original, variation))
 
 def is_letter_duplicated(original: str, variation: str) -> bool:
     """Check if a letter is duplicated"""
-    # Check if variation is one character longer
-    if len(variation) != len(original) + 1:
-        return False
-    
-    # Try duplicating each letter and see if we get the variation
-    for i, char in enumerate(original):
-        test = original[:i] + char + original[i:]
-        if test == variation:
-            return True
-    
-    return False
+    return _letter_duplicated(PairFeatures(original, variation))
 
 def is_random_letter_inserted(original: str, variation: str) -> bool:
     """Check if a random letter is inserted"""
-    # Check if variation is one character longer
-    if len(variation) != len(original) + 1:
-        return False
-    
-    # Use Levenshtein to check if it's a single character insertion
-    return Levenshtein.distance(original, variation) == 1
+    return _random_letter_inserted(PairFeatures(original, variation))
 
 def is_title_added(original: str, variation: str) -> bool:
     """Check if a title is added to the name"""
-    if original == variation:
-        return False
-    titles = ["Mr.", "Mrs.", "Ms.", "Mr", "Mrs", "Ms", "Miss", "Dr.", "Dr",
-              "Prof.", "Prof", "Sir", "Lady", "Lord", "Dame", "Master", "Mistress",
-              "Rev.", "Hon.", "Capt.", "Col.", "Lt.", "Sgt.", "Maj."]
-    
-    for title in titles:
-        # Check if title was added at beginning
-        if variation.startswith(title + " " + original):
-            return True
-        # Check if title was added with some name manipulation
-        if variation.startswith(title + " ") and Levenshtein.distance(original, variation[len(title)+1:]) <= 2:
-            return True
-    
-    return False
+    return _title_added(PairFeatures(original, variation))
 
 def is_suffix_added(original: str, variation: str) -> bool:
     """Check if a suffix is added to the name"""
-    if original == variation:
-        return False
-    suffixes = ["Jr.", "Sr.", "III", "IV", "V", "PhD", "MD", "Esq.", "Jr", "Sr"]
-    
-    for suffix in suffixes:
-        # Check if suffix was added at end
-        if variation == original + " " + suffix:
-            return True
-        # Check if suffix was added with some name manipulation
-        if variation.endswith(" " + suffix) and Levenshtein.distance(original, variation[:-len(suffix)-1]) <= 2:
-            return True
-    
-    return False
+    return _suffix_added(PairFeatures(original, variation))
 
 def is_initials_only(original: str, variation: str) -> bool:
     """Check if the name is converted to initials"""
-    if original == variation:
-        return False
-    parts = original.split()
-    
-    if len(parts) < 2:
-        return False
-    
-    # Check if variation consists of initials
-    initials = ".".join([p[0] for p in parts]) + "."
-    initials_spaced = ". ".join([p[0] for p in parts]) + "."
-    initials_no_dots = "".join([p[0] for p in parts])
-    
-    return variation in [initials, initials_spaced, initials_no_dots]
+    return _initials_only(PairFeatures(original, variation))
 
 def is_name_parts_permutation(original: str, variation: str) -> bool:
     """Check if the name parts are permuted"""
-    if original == variation:
-        return True # This is a special case, a permutation of 1 is the same
-    original_parts = original.split()
-    variation_parts = variation.split()
-    
-    if len(original_parts) != len(variation_parts) or len(original_parts) < 2:
-        return False
-    
-    # Check if variation parts are a permutation of original parts
-    return sorted(original_parts) == sorted(variation_parts) and original_parts != variation_parts
+    return _name_parts_permutation(PairFeatures(original, variation))
 
 def is_first_name_initial(original: str, variation: str) -> bool:
     """Check if first name is reduced to initial"""
-    if original == variation:
-        return False
-    parts = original.split()
-    
-    if len(parts) < 2:
-        return False
-    
-    # Compare with original first name as initial
-    test_variation = parts[0][0] + ". " + " ".join(parts[1:])
-    test_variation2 = parts[0][0] + "." + " ".join(parts[1:])
-    
-    return variation in [test_variation, test_variation2]
+    return _first_name_initial(PairFeatures(original, variation))
 
 # Map rule names to their evaluation functions
 RULE_EVALUATORS = {
@@ -393,6 +403,166 @@ RULE_EVALUATORS = {
     "shorten_name_to_abbreviations": is_name_abbreviated
 }
 
+# Map rule names to the feature-based checks behind RULE_EVALUATORS
+RULE_CHECKS = {
+    "replace_spaces_with_random_special_characters": _space_replaced_with_special_chars,
+    "replace_double_letters_with_single_letter": _double_letter_replaced,
+    "replace_random_vowel_with_random_vowel": _vowel_replaced,
+    "replace_random_consonant_with_random_consonant": _consonant_replaced,
+    "replace_random_special_character_with_random_special_character": _special_character_replaced,
+    "swap_random_letter": _letters_swapped,
+    "swap_adjacent_consonants": _letters_swapped,
+    "swap_adjacent_syllables": _letters_swapped,
+    "delete_random_letter": _letter_removed,
+    "remove_random_vowel": _vowel_removed,
+    "remove_random_consonant": _consonant_removed,
+    "remove_random_special_character": _special_removed,
+    "remove_title": _title_removed,
+    "remove_all_spaces": _all_spaces_removed,
+    "duplicate_random_letter_as_double_letter": _letter_duplicated,
+    "insert_random_letter": _random_letter_inserted,
+    "add_random_leading_title": _title_added,
+    "add_random_trailing_title": _suffix_added,
+    "shorten_name_to_initials": _initials_only,
+    "name_parts_permutations": _name_parts_permutation,
+    "initial_only_first_name": _first_name_initial,
+    "shorten_name_to_abbreviations": _name_abbreviated
+}
+
+class Rule(enum.IntFlag):
+    """One bit per rule in RULE_CHECKS; a member's name is its upper-cased rule name"""
+    REPLACE_SPACES_WITH_RANDOM_SPECIAL_CHARACTERS = enum.auto()
+    REPLACE_DOUBLE_LETTERS_WITH_SINGLE_LETTER = enum.auto()
+    REPLACE_RANDOM_VOWEL_WITH_RANDOM_VOWEL = enum.auto()
+    REPLACE_RANDOM_CONSONANT_WITH_RANDOM_CONSONANT = enum.auto()
+    REPLACE_RANDOM_SPECIAL_CHARACTER_WITH_RANDOM_SPECIAL_CHARACTER = enum.auto()
+    SWAP_RANDOM_LETTER = enum.auto()
+    SWAP_ADJACENT_CONSONANTS = enum.auto()
+    SWAP_ADJACENT_SYLLABLES = enum.auto()
+    DELETE_RANDOM_LETTER = enum.auto()
+    REMOVE_RANDOM_VOWEL = enum.auto()
+    REMOVE_RANDOM_CONSONANT = enum.auto()
+    REMOVE_RANDOM_SPECIAL_CHARACTER = enum.auto()
+    REMOVE_TITLE = enum.auto()
+    REMOVE_ALL_SPACES = enum.auto()
+    DUPLICATE_RANDOM_LETTER_AS_DOUBLE_LETTER = enum.auto()
+    INSERT_RANDOM_LETTER = enum.auto()
+    ADD_RANDOM_LEADING_TITLE = enum.auto()
+    ADD_RANDOM_TRAILING_TITLE = enum.auto()
+    SHORTEN_NAME_TO_INITIALS = enum.auto()
+    NAME_PARTS_PERMUTATIONS = enum.auto()
+    INITIAL_ONLY_FIRST_NAME = enum.auto()
+    SHORTEN_NAME_TO_ABBREVIATIONS = enum.auto()
+
+# Plain-int bit for each rule name, used on the hot path instead of enum arithmetic
+RULE_BITS = {rule: int(Rule[rule.upper()]) for rule in RULE_CHECKS}
+ALL_RULES_MASK = int(Rule(sum(RULE_BITS.values())))
+
+# Bits answered by each distinct check (several rules share one check)
+_CHECK_MASKS = {}
+for _rule, _check in RULE_CHECKS.items():
+    _CHECK_MASKS[_check] = _CHECK_MASKS.get(_check, 0) | RULE_BITS[_rule]
+
+# (original, variation) -> (evaluated bits, satisfied bits), most recently used last
+RULE_CLASSIFICATION_CACHE_SIZE = 65536
+_classification_cache = OrderedDict()
+_classification_lock = threading.Lock()
+
+def rule_mask(rules: List[str]) -> int:
+    """Bitmask of the known rules in a rule list"""
+    mask = 0
+    for rule in rules:
+        mask |= RULE_BITS.get(rule, 0)
+    return mask
+
+def rules_in_mask(mask: int, rules: List[str] = None) -> List[str]:
+    """Rule names whose bit is set in mask, in the order of rules (default: RULE_CHECKS order)"""
+    if rules is None:
+        rules = RULE_CHECKS
+    return [rule for rule in dict.fromkeys(rules) if mask & RULE_BITS.get(rule, 0)]
+
+def classify_variation(original_name: str, variation: str, mask: int = ALL_RULES_MASK) -> int:
+    """
+    Return the bitmask of rules (restricted to mask) satisfied by a variation.
+
+    Results are memoized per (original_name, variation) in a bounded LRU, and
+    only the checks not already evaluated for the pair are run, so scoring and
+    the variation modifier share work on the same pairs.
+    """
+    key = (original_name, variation)
+    with _classification_lock:
+        entry = _classification_cache.get(key)
+        if entry is not None:
+            _classification_cache.move_to_end(key)
+    evaluated, satisfied = entry or (0, 0)
+
+    missing = mask & ~evaluated
+    CACHE_LOOKUPS.inc(cache="rule_classification", result="miss" if missing else "hit")
+    if missing:
+        features = PairFeatures(original_name, variation)
+        for check, check_mask in _CHECK_MASKS.items():
+            if not check_mask & missing:
+                continue
+            try:
+                if check(features):
+                    satisfied |= check_mask
+            except Exception as e:
+                for rule in rules_in_mask(check_mask & mask):
+                    print(f"Error evaluating rule {rule} for {variation}: {str(e)}")
+            evaluated |= check_mask
+        with _classification_lock:
+            _classification_cache[key] = (evaluated, satisfied)
+            _classification_cache.move_to_end(key)
+            while len(_classification_cache) > RULE_CLASSIFICATION_CACHE_SIZE:
+                _classification_cache.popitem(last=False)
+
+    return satisfied & mask
+
+def classify_variations(
+    original_name: str,
+    variations: List[str],
+    rules: List[str]
+) -> Dict[str, int]:
+    """
+    Classify every variation against a rule list in a single pass.
+
+    Args:
+        original_name: The original name
+        variations: List of name variations
+        rules: List of rule names to check against
+
+    Returns:
+        Dictionary mapping each distinct variation to the bitmask of satisfied rules
+    """
+    mask = rule_mask(rules)
+    distinct = list(dict.fromkeys(variations))
+    pair_cache = get_pair_cache()
+    if pair_cache is None:
+        return {variation: classify_variation(original_name, variation, mask) for variation in distinct}
+
+    # Warm the in-process LRU from the persistent cache, then write back whatever changed
+    with _classification_lock:
+        known = {v: _classification_cache.get((original_name, v)) for v in distinct}
+    unknown = [v for v, entry in known.items() if entry is None or mask & ~entry[0]]
+    if unknown:
+        persisted = pair_cache.get_rule_masks(original_name, unknown)
+        with _classification_lock:
+            for variation, (evaluated, satisfied) in persisted.items():
+                entry = known[variation] or (0, 0)
+                known[variation] = (entry[0] | evaluated, entry[1] | satisfied)
+                _classification_cache[(original_name, variation)] = known[variation]
+
+    result = {variation: classify_variation(original_name, variation, mask) for variation in distinct}
+
+    changed = {}
+    with _classification_lock:
+        for variation in unknown:
+            entry = _classification_cache.get((original_name, variation))
+            if entry is not None and entry != known[variation]:
+                changed[variation] = entry
+    pair_cache.put_rule_masks(original_name, changed)
+    return result
+
 def evaluate_rule_compliance(
     original_name: str,
     variations: List[str],
@@ -400,12 +570,12 @@ def evaluate_rule_compliance(
 ) -> Tuple[Dict[str, List[str]], float]:
     """
     Evaluate which variations comply with which rules
-    
+
     Args:
         original_name: The original name
         variations: List of name variations
         rules: List of rule names to check against
-        
+
     Returns:
         Tuple containing:
         - Dictionary mapping rules to lists of compliant variations
@@ -416,20 +586,17 @@ def evaluate_rule_compliance(
 
     # Initialize the result dictionary
     compliant_variations = {rule: [] for rule in rules}
-    all_compliant_variations = set()
-    
-    # For each variation, check if it complies with any of the rules
+    masks = classify_variations(original_name, variations, rules)
+
     for variation in variations:
-        for rule in rules:
-            if rule in RULE_EVALUATORS:
-                try:
-                    if RULE_EVALUATORS[rule](original_name, variation):
-                        compliant_variations[rule].append(variation)
-                        all_compliant_variations.add(variation)
-                except Exception as e:
-                    print(f"Error evaluating rule {rule} for {variation}: {str(e)}")
-    
+        mask = masks[variation]
+        if mask:
+            for rule in rules:
+                if mask & RULE_BITS.get(rule, 0):
+                    compliant_variations[rule].append(variation)
+
     # Calculate the compliance ratio
-    compliance_ratio = len(all_compliant_variations) / len(variations) if variations else 0.0
-    
-    return compliant_variations, compliance_ratio 
\ No newline at end of file
+    compliant_count = sum(1 for mask in masks.values() if mask)
+    compliance_ratio = compliant_count / len(variations) if variations else 0.0
+
+    return compliant_variations, compliance_ratio
@@ -1,6 +1,58 @@
+import os
+import time
+from flask import g
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta, timezone
 from app.model.score import db, UserUID, ScoreSession, AverageScore
+from app.service.idempotency import purge_expired_idempotency_keys
+from app.utils.metrics import SCHEDULER_JOB
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; every process acts as leader there
+    fcntl = None
+
+# How often standby processes try to take over leadership (bounds takeover time)
+LEADER_RETRY_SECONDS = 30
+
+
+class LeaderLock:
+    """
+    Exclusive, non-blocking file lock electing one scheduler leader per host.
+
+    Every worker runs a scheduler, but jobs only do work in the process holding
+    the lock. The OS releases the lock when the holder exits or crashes, so a
+    standby takes over on its next attempt, at most LEADER_RETRY_SECONDS later.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    @property
+    def is_leader(self) -> bool:
+        # A forked child inherits the descriptor but not the leadership
+        return self._fd is not None and self._pid == os.getpid()
+
+    def try_acquire(self) -> bool:
+        """Become leader if no other live process holds the lock"""
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self._fd, self._pid = -1, os.getpid()
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # Record the holder for operators; the lock itself is what matters
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd, self._pid = fd, os.getpid()
+        return True
 
 
 def store_hourly_average_for_all_users():
@@ -33,19 +85,57 @@ def store_hourly_average_for_all_users():
 
 
 def start_scheduler(app):
-    """Start background scheduler to store hourly averages."""
+    """
+    Start background scheduler to store hourly averages and purge expired idempotency keys.
+
+    Safe to call from every gunicorn worker: only the process holding the
+    leader lock (app.config['SCHEDULER_LOCK_PATH'], default
+    <instance_path>/scheduler.lock) runs the jobs.
+    """
+    lock_path = app.config.get('SCHEDULER_LOCK_PATH')
+    if not lock_path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        lock_path = os.path.join(app.instance_path, 'scheduler.lock')
+    leader = LeaderLock(lock_path)
     scheduler = BackgroundScheduler()
 
-    def job():
-        # Ensure the job runs within the application context so that
-        # database operations work correctly.
-        with app.app_context():
-            store_hourly_average_for_all_users()
+    def elect():
+        if not leader.is_leader and leader.try_acquire():
+            print(f"Process {os.getpid()} is now the scheduler leader")
+
+    def as_leader(func):
+        def job():
+            if not leader.try_acquire():
+                return  # Another process is the leader
+            # Ensure the job runs within the application context so that
+            # database operations work correctly.
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                with app.app_context():
+                    g.job_name = func.__name__  # Attributes the job's queries in the slow-query log
+                    func()
+                status = 'ok'
+            finally:
+                SCHEDULER_JOB.observe(time.perf_counter() - start, job=func.__name__, status=status)
+        return job
 
     scheduler.add_job(
-        func=job,
+        func=elect,
+        trigger="interval",
+        seconds=LEADER_RETRY_SECONDS,
+        next_run_time=datetime.now(),
+    )
+    scheduler.add_job(
+        func=as_leader(store_hourly_average_for_all_users),
         trigger="cron",
         minute=12,  # Only at minute 12 each hour
     )
+    scheduler.add_job(
+        func=as_leader(purge_expired_idempotency_keys),
+        trigger="cron",
+        minute=42,
+    )
     scheduler.start()
     print("Scheduler was started")
+    return scheduler
@@ -3,7 +3,8 @@ import jellyfish
 from typing import List, Dict, Tuple
 import re
 import Levenshtein
-from app.utils.rule_evaluator import evaluate_rule_compliance
+from app.utils.reward import orthographic_similarity_at_least
+from app.utils.rule_evaluator import classify_variations, rules_in_mask
 
 def modify_variations_to_match_config(
     original_name: str, 
@@ -242,8 +243,14 @@ def adjust_rule_transformation_distribution_smart(original_name: str, variations
     """
     Intelligently adjust variations to match rule transformation distribution targets.
     """
-    # Re-analyze current variations
-    compliance_results, compliance_ratio = evaluate_rule_compliance(original_name, variations, list(targets.keys()))
+    # Re-analyze current variations (classifications are shared with scoring)
+    rules = list(targets.keys())
+    satisfied_masks = classify_variations(original_name, variations, rules)
+    compliance_results = {rule: [] for rule in rules}
+    for variation in variations:
+        for rule in rules_in_mask(satisfied_masks[variation], rules):
+            compliance_results[rule].append(variation)
+    compliance_ratio = sum(1 for mask in satisfied_masks.values() if mask) / len(variations) if variations else 0.0
     print(f"  Rule transformation distribution: {compliance_results}")
     print(f"  Compliance ratio: {compliance_ratio}")
     return 
@@ -272,9 +279,11 @@ def print_analysis_in_format(
         else:
             phonetic_counts['far'] += 1
         
-        # Calculate orthographic similarity
-        orthographic_score = calculate_orthographic_similarity(original_name, variation)
-        if 0.70 <= orthographic_score <= 1.00:
+        # Only the band is needed here, so the distance stops once it is below medium
+        orthographic_score = orthographic_similarity_at_least(original_name, variation, 0.50)
+        if orthographic_score is None:
+            orthographic_counts['far'] += 1
+        elif 0.70 <= orthographic_score <= 1.00:
             orthographic_counts['light'] += 1
         elif 0.50 <= orthographic_score < 0.70:
             orthographic_counts['medium'] += 1
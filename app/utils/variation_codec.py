@@ -0,0 +1,104 @@
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List
+
+# Blob layout (little-endian):
+#   u8 version (high bit set = body below is zlib-compressed), u32 count
+#   part bitmap, ceil(count / 8) bytes, bit set = 'last' name part
+#   f32[count] phonetic scores, f32[count] orthographic scores
+#   u16[count] UTF-8 byte lengths, then the concatenated UTF-8 variation strings
+CODEC_VERSION = 1
+_COMPRESSED = 0x80
+_HEADER = struct.Struct('<BI')
+# Variations of one name share most characters, so the body usually shrinks 2-3x
+COMPRESS_MIN_BYTES = 64
+# float32 keeps ~7 significant digits; decoded scores are rounded to that
+DECODE_PRECISION = 7
+NAME_PARTS = ('first', 'last')
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode: str, blob: bytes, offset: int, count: int):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(blob[offset:end])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, end
+
+
+def pack_variations(variations: List[Dict]) -> bytes:
+    """
+    Pack a name's variation scores into one compact blob.
+
+    Args:
+        variations: Dicts with 'variation', 'phonetic_score', 'orthographic_score'
+            and 'name_part' ('first' or 'last')
+
+    Returns:
+        Encoded bytes; see the layout above
+    """
+    count = len(variations)
+    bitmap = bytearray((count + 7) // 8)
+    phonetic = array('f')
+    orthographic = array('f')
+    lengths = array('H')
+    encoded = []
+    for i, var in enumerate(variations):
+        if var['name_part'] == 'last':
+            bitmap[i >> 3] |= 1 << (i & 7)
+        phonetic.append(var['phonetic_score'])
+        orthographic.append(var['orthographic_score'])
+        text = var['variation'].encode('utf-8')
+        if len(text) > 0xFFFF:
+            raise ValueError(f"Variation too long to pack: {len(text)} bytes")
+        lengths.append(len(text))
+        encoded.append(text)
+    body = b''.join((
+        bytes(bitmap),
+        _little_endian(phonetic),
+        _little_endian(orthographic),
+        _little_endian(lengths),
+        *encoded,
+    ))
+    version = CODEC_VERSION
+    if len(body) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(body, 6)
+        if len(compressed) < len(body):
+            body, version = compressed, CODEC_VERSION | _COMPRESSED
+    return _HEADER.pack(version, count) + body
+
+
+def unpack_variations(blob: bytes) -> List[Dict]:
+    """Decode a pack_variations() blob back into variation dicts, in the original order"""
+    version, count = _HEADER.unpack_from(blob, 0)
+    if version & ~_COMPRESSED != CODEC_VERSION:
+        raise ValueError(f"Unsupported packed variations version {version}")
+    blob = blob[_HEADER.size:]
+    if version & _COMPRESSED:
+        blob = zlib.decompress(blob)
+    offset = 0
+    bitmap = blob[offset:offset + (count + 7) // 8]
+    offset += len(bitmap)
+    phonetic, offset = _read_array('f', blob, offset, count)
+    orthographic, offset = _read_array('f', blob, offset, count)
+    lengths, offset = _read_array('H', blob, offset, count)
+    variations = []
+    for i in range(count):
+        end = offset + lengths[i]
+        variations.append({
+            'variation': blob[offset:end].decode('utf-8'),
+            'phonetic_score': round(phonetic[i], DECODE_PRECISION),
+            'orthographic_score': round(orthographic[i], DECODE_PRECISION),
+            'name_part': NAME_PARTS[(bitmap[i >> 3] >> (i & 7)) & 1],
+        })
+        offset = end
+    return variations
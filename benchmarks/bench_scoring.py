@@ -0,0 +1,277 @@
+"""
+Reproducible scoring benchmarks over synthetic miner workloads.
+
+Generates variation_config / variation_result payloads from a fixed seed:
+seed names of 1-3 parts with realistic length spread (some with titles),
+5-200 variations per name, and rule mixes drawn from RULE_GENERATORS.
+It then times the scoring hot paths and prints (or writes) JSON results.
+Pass a previous run's JSON via --baseline to fail (exit code 1) when a
+benchmark's median regresses past the threshold.
+
+str hashes pick each seed's phonetic algorithms, so the benchmark re-runs
+itself under a fixed PYTHONHASHSEED (HASH_SEED unless one is already set)
+and records it in the results; --baseline refuses a baseline taken under
+another hash seed.
+
+Caches (seed contexts, phonetic profiles, rule classifications) are cleared
+before every repetition so timings measure real work; use --warm to measure
+the steady state instead. The persistent pair cache is always disabled.
+
+Usage:
+    python -m benchmarks.bench_scoring --output bench.json
+    python -m benchmarks.bench_scoring --baseline bench.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.pop('YANEZ_PAIR_CACHE_PATH', None)
+
+from app.utils import reward, rule_evaluator  # noqa: E402
+from app.utils.rule_applier import RULE_GENERATORS, generate_variation_by_rule  # noqa: E402
+from app.utils.var_modifier import modify_variation_result_to_match_config  # noqa: E402
+
+VARIATION_COUNTS = (5, 20, 50, 200)
+# PYTHONHASHSEED used when the caller has not fixed one
+HASH_SEED = "0"
+SYLLABLES = ["an", "ber", "cha", "da", "el", "fi", "gor", "ha", "is", "jo", "ka", "li",
+             "ma", "nel", "o", "pe", "qui", "ro", "sa", "ton", "u", "vi", "wel", "xa", "yo", "zel"]
+TITLES = ["Dr.", "Mr.", "Mrs.", "Prof."]
+
+
+def make_name(rng: random.Random) -> str:
+    """Seed name with 1-3 parts of 1-4 syllables each; a few carry a title"""
+    parts = []
+    for _ in range(rng.choices((1, 2, 3), weights=(3, 6, 1))[0]):
+        part = "".join(rng.choice(SYLLABLES) for _ in range(rng.choices((1, 2, 3, 4), weights=(1, 4, 3, 1))[0]))
+        parts.append(part.capitalize() if rng.random() < 0.5 else part)
+    name = " ".join(parts)
+    if rng.random() < 0.1:
+        name = rng.choice(TITLES) + " " + name
+    return name
+
+
+def make_variations(rng: random.Random, name: str, count: int) -> List[str]:
+    """Mix of rule-based variations and random single/double character edits"""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    variations = []
+    random.seed(rng.random())  # rule generators use the global RNG
+    for _ in range(count):
+        if rng.random() < 0.4:
+            variations.append(generate_variation_by_rule(name, rng.choice(list(RULE_GENERATORS))))
+            continue
+        chars = list(name)
+        for _ in range(rng.randint(1, 3)):
+            pos = rng.randrange(len(chars) + 1)
+            op = rng.random()
+            if op < 0.4:
+                chars.insert(pos, rng.choice(letters))
+            elif op < 0.7 and pos < len(chars):
+                chars[pos] = rng.choice(letters)
+            elif pos < len(chars) and len(chars) > 1:
+                del chars[pos]
+        variations.append("".join(chars))
+    return variations
+
+
+def make_config(rng: random.Random, count: int) -> Dict:
+    """variation_config in the validator's format, with a random rule mix"""
+    def distribution():
+        weights = [rng.random() for _ in range(3)]
+        total = sum(weights)
+        return {
+            level: {"percentage": round(w / total, 2), "number": min(3, round(count * w / total))}
+            for level, w in zip(("light", "medium", "far"), weights)
+        }
+    return {
+        "variation_per_seed_name": count,
+        "phonetic_similarity_distribution": distribution(),
+        "orthographic_similarity_distribution": distribution(),
+        "rule_transformation": {
+            "selected_rules": rng.sample(list(RULE_GENERATORS), rng.randint(1, 5)),
+            "rule_percentage": rng.choice((10, 20, 30, 50)),
+        },
+    }
+
+
+def make_workload(seed: int, count: int, names: int) -> Dict:
+    """One payload of `names` seed names with `count` variations each"""
+    rng = random.Random(seed * 1000 + count)
+    config = make_config(rng, count)
+    result = {}
+    while len(result) < names:
+        name = make_name(rng)
+        result[name] = make_variations(rng, name, count)
+    return {"variation_config": config, "variation_result": result}
+
+
+def clear_caches():
+    reward._build_seed_context.cache_clear()
+    reward.get_phonetic_profile.cache_clear()
+    rule_evaluator._classification_cache.clear()
+
+
+def time_call(func: Callable, repeat: int, warm: bool) -> Dict[str, float]:
+    samples = []
+    sink = io.StringIO()
+    for _ in range(repeat):
+        if not warm:
+            clear_caches()
+        random.seed(0)
+        with contextlib.redirect_stdout(sink):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        sink.seek(0)
+        sink.truncate()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(seed: int, names: int, repeat: int, warm: bool, counts=VARIATION_COUNTS) -> Dict[str, Dict]:
+    results = {}
+    for count in counts:
+        workload = make_workload(seed, count, names)
+        config = workload["variation_config"]
+        items = list(workload["variation_result"].items())
+        phonetic = {k.capitalize(): v["percentage"] for k, v in config["phonetic_similarity_distribution"].items()}
+        orthographic = {k.capitalize(): v["percentage"] for k, v in config["orthographic_similarity_distribution"].items()}
+        rules = config["rule_transformation"]["selected_rules"]
+        all_rules = list(RULE_GENERATORS)
+
+        def variation_quality():
+            for name, variations in items:
+                reward.calculate_variation_quality(
+                    name, variations, phonetic, orthographic, count, config["rule_transformation"]
+                )
+
+        def part_score():
+            for name, variations in items:
+                reward.calculate_part_score(
+                    name.split()[0], [v.split()[0] for v in variations if v.split()], phonetic, orthographic, count
+                )
+
+        def rule_compliance_selected():
+            for name, variations in items:
+                rule_evaluator.evaluate_rule_compliance(name, variations, rules)
+
+        def rule_compliance_all():
+            for name, variations in items:
+                rule_evaluator.evaluate_rule_compliance(name, variations, all_rules)
+
+        def modify_result():
+            modify_variation_result_to_match_config(workload["variation_result"], config)
+
+        for bench, func in (
+            ("calculate_variation_quality", variation_quality),
+            ("calculate_part_score", part_score),
+            ("evaluate_rule_compliance[selected]", rule_compliance_selected),
+            ("evaluate_rule_compliance[all]", rule_compliance_all),
+            ("modify_variation_result_to_match_config", modify_result),
+        ):
+            results[f"{bench}/n={count}"] = time_call(func, repeat, warm)
+            print(f"{bench}/n={count}: {results[f'{bench}/n={count}']['median_ms']:.2f} ms", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """Benchmarks whose median grew by more than threshold (as a fraction) over the baseline"""
+    regressions = []
+    for bench, stats in results.items():
+        base = baseline.get(bench)
+        if not base or base["median_ms"] <= 0:
+            continue
+        change = stats["median_ms"] / base["median_ms"] - 1.0
+        if change > threshold:
+            regressions.append({
+                "benchmark": bench,
+                "baseline_ms": base["median_ms"],
+                "current_ms": stats["median_ms"],
+                "change": round(change, 3),
+            })
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def pin_hash_seed():
+    """Re-execute this module under a fixed PYTHONHASHSEED unless one is already set"""
+    seed = os.environ.get("PYTHONHASHSEED", "")
+    if seed.isdigit():
+        return
+    env = dict(os.environ, PYTHONHASHSEED=HASH_SEED)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    os.execve(sys.executable, [sys.executable, "-m", "benchmarks.bench_scoring", *sys.argv[1:]], env)
+
+
+def main():
+    pin_hash_seed()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1, help="Workload generator seed")
+    parser.add_argument("--names", type=int, default=8, help="Seed names per workload")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=list(VARIATION_COUNTS), help="Variations per name")
+    parser.add_argument("--warm", action="store_true", help="Keep caches between repetitions")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed median slowdown, as a fraction")
+    args = parser.parse_args()
+    hash_seed = os.environ["PYTHONHASHSEED"]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline_hash_seed = baseline.get("meta", {}).get("hash_seed")
+        if baseline_hash_seed != hash_seed:
+            parser.error(f"baseline was run with PYTHONHASHSEED={baseline_hash_seed}, this run uses {hash_seed}")
+
+    results = run_benchmarks(args.seed, args.names, args.repeat, args.warm, tuple(args.counts))
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "names": args.names,
+            "warm": args.warm,
+            "hash_seed": hash_seed,
+        },
+        "results": results,
+    }
+    if baseline is not None:
+        report["baseline_revision"] = baseline.get("meta", {}).get("revision")
+        report["threshold"] = args.threshold
+        report["regressions"] = compare(results, baseline.get("results", {}), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
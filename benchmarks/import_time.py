@@ -0,0 +1,85 @@
+"""
+Import-time budget check for worker cold start.
+
+Runs `python -X importtime` on the app factory in a fresh interpreter and fails
+(exit code 1) when building the app takes longer than the budget or pulls in
+the scoring stack, which must stay lazy so workers boot fast. With --preload it
+instead checks that PRELOAD_SCORING imports the stack, so a gunicorn --preload
+master holds those pages for its forked workers.
+
+Usage:
+    python -m benchmarks.import_time [--budget-ms 1500] [--preload]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that belong to the scoring stack and must not load at startup
+SCORING_MODULES = ('numpy', 'jellyfish', 'Levenshtein', 'app.utils.reward', 'app.utils.var_modifier')
+
+SNIPPET = (
+    "from app import create_app; "
+    "create_app({{'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'CREATE_SCHEMA': False, "
+    "'SCHEDULER_ENABLED': False, 'PRELOAD_SCORING': {preload}}})"
+)
+
+
+def measure(preload: bool = False) -> dict:
+    """Return the cumulative import time (ms) of every top-level import made while building the app"""
+    env = dict(os.environ, YANEZ_API_KEY=os.environ.get('YANEZ_API_KEY', 'import-time-check'))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET.format(preload=preload)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"App factory failed to import:\n{proc.stderr}")
+
+    modules = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1000.0
+        # Nested imports are indented further; only top-level entries add up to the total
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative)
+    return {"total_ms": total_us / 1000.0, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='Maximum cumulative import time')
+    parser.add_argument('--preload', action='store_true', help='Check PRELOAD_SCORING instead of lazy startup')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to report')
+    args = parser.parse_args()
+
+    result = measure(preload=args.preload)
+    loaded = [name for name in SCORING_MODULES if name in result["modules"]]
+    slowest = sorted(result["modules"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    failures = []
+    if not args.preload and result["total_ms"] > args.budget_ms:
+        failures.append(f"import time {result['total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+    if not args.preload and loaded:
+        failures.append(f"scoring stack imported at startup: {', '.join(loaded)}")
+    if args.preload and len(loaded) != len(SCORING_MODULES):
+        missing = sorted(set(SCORING_MODULES) - set(loaded))
+        failures.append(f"PRELOAD_SCORING did not import: {', '.join(missing)}")
+
+    print(json.dumps({
+        "total_ms": round(result["total_ms"], 1),
+        "budget_ms": args.budget_ms,
+        "scoring_modules_loaded": loaded,
+        "slowest": [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in slowest],
+        "failures": failures
+    }, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""
+End-to-end HTTP load test for the scoring API.
+
+Replays recorded POST /api/yanez/score payloads (a jsonl capture, one request
+body per line, or {"json": body} records) mixed with GET listing, per-uid
+detail pagination and avg_score traffic, and reports p50/p95/p99 latency,
+throughput, errors and SQLite "database is locked" failures per endpoint.
+Without a capture, payloads are generated with the bench_scoring workload
+generator.
+
+Targets:
+    inprocess  Flask test client against create_app() on a temporary SQLite file
+    gunicorn   a local gunicorn started by the harness (--workers, --threads)
+    url        an already running server (--url)
+
+Usage:
+    python -m benchmarks.load_test --target inprocess --requests 200
+    python -m benchmarks.load_test --target gunicorn --workers 4 --concurrency 16 --duration 30
+    python -m benchmarks.load_test --capture capture.jsonl --mix score=2,list=1,detail=4,avg=1 --rate 20
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_API_KEY = 'load-test-key'
+DEFAULT_MIX = 'score=1,list=2,detail=4,avg=2'
+ENDPOINTS = ('score', 'list', 'detail', 'avg')
+LOCK_ERROR = 'database is locked'
+
+
+def load_capture(path: str) -> List[Dict]:
+    """POST bodies from a jsonl capture; accepts bare bodies or {"json": body} / {"body": body} records"""
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            body = record.get('json') or record.get('body') or record
+            if isinstance(body, str):
+                body = json.loads(body)
+            if isinstance(body, dict) and 'variation_result' in body:
+                payloads.append(body)
+    return payloads
+
+
+def synthetic_payloads(count: int, seed: int, variations: int) -> List[Dict]:
+    from benchmarks.bench_scoring import make_workload
+    return [make_workload(seed + i, variations, names=random.Random(seed + i).randint(1, 5)) for i in range(count)]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}', expected one of {', '.join(ENDPOINTS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a sorted list"""
+    if not samples:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(samples) + 0.5)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+class Stats:
+    """Thread-safe per-endpoint latency samples and error counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+        self.lock_errors = {name: 0 for name in ENDPOINTS}
+        self.statuses = {name: {} for name in ENDPOINTS}
+
+    def record(self, endpoint: str, status: int, latency_ms: float, body: bytes):
+        with self._lock:
+            self.latencies[endpoint].append(latency_ms)
+            self.statuses[endpoint][status] = self.statuses[endpoint].get(status, 0) + 1
+            if status >= 400 and status != 404:
+                self.errors[endpoint] += 1
+            if LOCK_ERROR.encode() in body:
+                self.lock_errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name in ENDPOINTS:
+            samples = sorted(self.latencies[name])
+            if not samples:
+                continue
+            endpoints[name] = {
+                'requests': len(samples),
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(samples, 50), 2),
+                'p95_ms': round(percentile(samples, 95), 2),
+                'p99_ms': round(percentile(samples, 99), 2),
+                'max_ms': round(samples[-1], 2),
+                'errors': self.errors[name],
+                'db_lock_errors': self.lock_errors[name],
+                'status_codes': {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'errors': sum(self.errors.values()),
+            'db_lock_errors': sum(self.lock_errors.values()),
+            'endpoints': endpoints,
+        }
+
+
+class InProcessClient:
+    """Flask test client; one per thread"""
+
+    def __init__(self, app, api_key: str):
+        self.client = app.test_client()
+        self.headers = {'X-API-KEY': api_key}
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        response = self.client.open(path, method=method, json=body, headers=self.headers)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class HTTPClient:
+    """Keep-alive HTTP/1.1 connection; one per thread"""
+
+    def __init__(self, base_url: str, api_key: str, timeout: float):
+        url = urlparse(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = timeout
+        self.headers = {'X-API-KEY': api_key, 'Content-Type': 'application/json'}
+        self.conn = None
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=data, headers=self.headers)
+                response = self.conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # The worker may have closed an idle keep-alive connection; retry once on a fresh one
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class Schedule:
+    """Hands out (endpoint, scheduled start) pairs until the request count or duration runs out"""
+
+    def __init__(self, mix: Dict[str, float], total: Optional[int], duration: Optional[float],
+                 rate: Optional[float], seed: int):
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.total = total
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.issued = 0
+        self.start = time.perf_counter()
+        self.deadline = self.start + duration if duration else None
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return self
+
+    def __next__(self) -> Tuple[str, float]:
+        with self._lock:
+            if self.total is not None and self.issued >= self.total:
+                raise StopIteration
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise StopIteration
+            at = self.start + self.issued / self.rate if self.rate else 0.0
+            self.issued += 1
+            return self.rng.choices(self.names, self.weights)[0], at
+
+
+def run_worker(client, schedule: Schedule, stats: Stats, payloads: List[Dict], uids: List[int],
+               page_size: int, seed: int):
+    rng = random.Random(seed)
+    for endpoint, at in schedule:
+        delay = at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        uid = rng.choice(uids)
+        if endpoint == 'score':
+            body = dict(rng.choice(payloads), uid=uid)
+            method, path = 'POST', '/api/yanez/score'
+        elif endpoint == 'list':
+            body, method, path = None, 'GET', '/api/yanez/score'
+        elif endpoint == 'detail':
+            query = urlencode({'uid': uid, 'page': rng.randint(1, 3), 'size': page_size})
+            body, method, path = None, 'GET', f'/api/yanez/score?{query}'
+        else:
+            body, method, path = None, 'GET', f'/api/yanez/avg_score/{uid}'
+        start = time.perf_counter()
+        try:
+            status, data = client.request(method, path, body)
+        except Exception as e:
+            status, data = 599, str(e).encode()
+        stats.record(endpoint, status, (time.perf_counter() - start) * 1000.0, data)
+    client.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(db_uri: str, api_key: str, workers: int, threads: int, timeout: int) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    config = {'SQLALCHEMY_DATABASE_URI': db_uri, 'SCHEDULER_ENABLED': False}
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--timeout', str(timeout),
+        '--log-level', 'warning',
+        f'app:create_app({config!r})',
+    ]
+    env = dict(os.environ, YANEZ_API_KEY=api_key)
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start listening within 30s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=('inprocess', 'gunicorn', 'url'), default='inprocess')
+    parser.add_argument('--url', help="Base URL for --target url, e.g. http://127.0.0.1:5000")
+    parser.add_argument('--api-key', default=os.getenv('YANEZ_API_KEY') or DEFAULT_API_KEY)
+    parser.add_argument('--capture', help="jsonl file of recorded POST /api/yanez/score bodies")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument('--requests', type=int, help="Total requests (default 200 unless --duration is set)")
+    parser.add_argument('--duration', type=float, help="Run for this many seconds instead of a request count")
+    parser.add_argument('--rate', type=float, help="Target total requests per second (default: as fast as possible)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Client threads")
+    parser.add_argument('--uids', type=int, default=20, help="Distinct miner uids")
+    parser.add_argument('--warmup-sessions', type=int, default=2, help="Sessions posted per uid before the run")
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--variations', type=int, default=20, help="Variations per name for synthetic payloads")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument('--timeout', type=int, default=120, help="gunicorn worker / client timeout in seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 200
+    payloads = load_capture(args.capture) if args.capture else synthetic_payloads(20, args.seed, args.variations)
+    if not payloads:
+        parser.error(f"No scoring payloads found in {args.capture}")
+    # Integers, like the UserUID.uid values real miners produce
+    uids = list(range(args.uids))
+
+    workdir = tempfile.mkdtemp(prefix='yanez-load-')
+    db_uri = f"sqlite:///{os.path.join(workdir, 'scores.db')}"
+    proc = None
+    devnull = open(os.devnull, 'w')
+    stack = contextlib.ExitStack()
+    try:
+        if args.target != 'url':
+            # auth reads the key at import time
+            os.environ['YANEZ_API_KEY'] = args.api_key
+            sys.path.insert(0, PROJECT_ROOT)
+            from app import create_app
+            # Creating the schema here keeps gunicorn workers from racing on create_all
+            app = create_app({
+                'SQLALCHEMY_DATABASE_URI': db_uri,
+                'SCHEDULER_ENABLED': False,
+                'PRELOAD_SCORING': args.target == 'inprocess',
+            })
+        if args.target == 'inprocess':
+            make_client = lambda: InProcessClient(app, args.api_key)
+        else:
+            if args.target == 'gunicorn':
+                proc, base_url = start_gunicorn(db_uri, args.api_key, args.workers, args.threads, args.timeout)
+            elif args.url:
+                base_url = args.url
+            else:
+                parser.error("--target url requires --url")
+            make_client = lambda: HTTPClient(base_url, args.api_key, args.timeout)
+
+        # Scoring prints diagnostics; keep them out of the report
+        if args.target == 'inprocess':
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+
+        # Give the GET endpoints something to read
+        warmup = make_client()
+        rng = random.Random(args.seed)
+        for uid in uids:
+            for _ in range(args.warmup_sessions):
+                warmup.request('POST', '/api/yanez/score', dict(rng.choice(payloads), uid=uid))
+        warmup.close()
+
+        stats = Stats()
+        schedule = Schedule(args.mix, args.requests, args.duration, args.rate, args.seed)
+        threads = [
+            threading.Thread(
+                target=run_worker,
+                args=(make_client(), schedule, stats, payloads, uids, args.page_size, args.seed + i),
+                daemon=True,
+            )
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - schedule.start
+    finally:
+        stack.close()
+        devnull.close()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = {
+        'meta': {
+            'target': args.target,
+            'workers': args.workers if args.target == 'gunicorn' else None,
+            'threads': args.threads if args.target == 'gunicorn' else None,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'mix': args.mix,
+            'payloads': len(payloads),
+            'capture': args.capture,
+            'database': db_uri if args.target != 'url' else None,
+        },
+        **stats.report(elapsed),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()